@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import torch
+
+from inference import BACKENDS, DEFAULT_MODEL_DIR, load_model, predict_proba
+from labels import label_dict
+from onnx_inference import OnnxPredictor, onnx_dir_for
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify a CSV of headlines in bulk.")
+    parser.add_argument("input", help="CSV with a headline column, e.g. latest_malaysian_news.csv")
+    parser.add_argument("--output", default="-", help="Output CSV path, or - for stdout")
+    parser.add_argument("--column", default="title")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--backend", default="fp32", choices=BACKENDS + ("onnx",),
+                        help="onnx serves the export of --model-dir from onnx_export.py")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows read from the CSV at a time")
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="torch intra-op threads")
+    parser.add_argument("--interop-threads", type=int, default=1, help="torch inter-op threads")
+    args = parser.parse_args()
+
+    # One large batch at a time keeps every core busy inside each op; inter-op parallelism only adds contention
+    torch.set_num_threads(args.threads)
+    torch.set_num_interop_threads(args.interop_threads)
+
+    if args.backend == "onnx":
+        predictor = OnnxPredictor(onnx_dir_for(args.model_dir), threads=args.threads)
+        num_labels = predictor.num_labels
+        score = lambda texts: predictor.predict_proba(texts, batch_size=args.batch_size)
+    else:
+        tokenizer, model = load_model(args.model_dir, backend=args.backend)
+        num_labels = model.config.num_labels
+        score = lambda texts: predict_proba(texts, tokenizer, model, batch_size=args.batch_size)
+    label_names = [label_dict.get(i, str(i)) for i in range(num_labels)]
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    total_rows = 0
+    start = time.perf_counter()
+    try:
+        # Results are written chunk by chunk, so memory stays flat however large the input is
+        for chunk_number, chunk in enumerate(pd.read_csv(args.input, chunksize=args.chunk_size)):
+            texts = chunk[args.column].fillna("").astype(str).tolist()
+            probabilities = score(texts)
+
+            result = chunk.copy()
+            predicted = probabilities.argmax(axis=1)
+            result["predicted_label"] = [label_names[i] for i in predicted]
+            result["confidence"] = probabilities.max(axis=1)
+            for i, name in enumerate(label_names):
+                result[f"prob_{name}"] = probabilities[:, i]
+
+            result.to_csv(output, index=False, header=chunk_number == 0, float_format="%.4f")
+            output.flush()
+            total_rows += len(chunk)
+            print(f"Scored {total_rows} headlines ({total_rows / (time.perf_counter() - start):.1f}/s)",
+                  file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Done: {total_rows} headlines in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+from transformers import BertTokenizerFast
+
+from bucketed_inference import BucketedPredictor
+from inference import load_model, predict_proba
+from onnx_inference import OnnxPredictor, onnx_dir_for
+from prediction_cache import model_version
+from profiling import latency_stats, run_in_process
+
+BACKENDS = ("eager", "int8", "trace", "compile", "onnx")
+
+
+def parse_ints(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def available_backends(model_dir, requested):
+    """The requested backends this machine can run; onnx needs onnxruntime and an onnx_export.py export."""
+    backends = []
+    for backend in requested:
+        if backend == "onnx":
+            try:
+                import onnxruntime  # noqa: F401
+            except ImportError:
+                print("Skipping onnx: onnxruntime is not installed")
+                continue
+            if not os.path.exists(os.path.join(onnx_dir_for(model_dir), "model.onnx")):
+                print(f"Skipping onnx: no export in {onnx_dir_for(model_dir)} (run onnx_export.py)")
+                continue
+        backends.append(backend)
+    return backends
+
+
+def build_backend(backend, model_dir, intra_threads):
+    """texts -> probabilities, running the whole list as one batch, plus the tokenizer used to build inputs."""
+    if backend == "onnx":
+        predictor = OnnxPredictor(onnx_dir_for(model_dir), threads=intra_threads)
+        return (lambda texts: predictor.predict_proba(texts, batch_size=len(texts))), \
+            BertTokenizerFast.from_pretrained(model_dir)
+
+    tokenizer, model = load_model(model_dir, backend="int8" if backend == "int8" else "fp32")
+    if backend == "trace":
+        return BucketedPredictor(tokenizer, model, mode="trace").predict_proba, tokenizer
+    if backend == "compile":
+        model = torch.compile(model, dynamic=True)
+    return (lambda texts: predict_proba(texts, tokenizer, model, batch_size=len(texts))), tokenizer
+
+
+def synthetic_headlines(tokenizer, seq_len, count, seed=0):
+    """Headlines of exactly seq_len tokens (including [CLS] and [SEP]) made of random whole-word vocabulary."""
+    rng = random.Random(seed)
+    words = [word for word in tokenizer.vocab if word.isalpha() and not word.startswith("[")]
+    headlines = []
+    for _ in range(count):
+        tokens = [rng.choice(words) for _ in range(seq_len - 2)]
+        headlines.append(tokenizer.convert_tokens_to_string(tokens))
+    return headlines
+
+
+def run_config(backend, model_dir, intra_threads, inter_threads, batch_sizes, seq_lens, csv_headlines,
+               batches_per_point, queue):
+    """One backend and thread setting, in a fresh process: inter-op threads can only be set once per process."""
+    torch.set_num_threads(intra_threads)
+    torch.set_num_interop_threads(inter_threads)
+    start = time.perf_counter()
+    predict_fn, tokenizer = build_backend(backend, model_dir, intra_threads)
+    load_seconds = time.perf_counter() - start
+
+    inputs = []
+    if csv_headlines:
+        inputs.append(("csv", csv_headlines))
+    for seq_len in seq_lens:
+        inputs.append((seq_len, synthetic_headlines(tokenizer, seq_len, 512)))
+
+    results = []
+    for seq_len, headlines in inputs:
+        for batch_size in batch_sizes:
+            batches = [
+                [headlines[(i * batch_size + j) % len(headlines)] for j in range(batch_size)]
+                for i in range(batches_per_point)
+            ]
+            stats = latency_stats(predict_fn, batches)
+            mean_tokens = float(np.mean([len(ids) for ids in tokenizer(batches[0], truncation=True,
+                                                                        max_length=128)["input_ids"]]))
+            results.append({
+                "backend": backend,
+                "intra_threads": intra_threads,
+                "inter_threads": inter_threads,
+                "input": "csv" if seq_len == "csv" else "synthetic",
+                "seq_len": mean_tokens if seq_len == "csv" else seq_len,
+                "batch_size": batch_size,
+                **stats,
+                "throughput": batch_size / (stats["mean_ms"] / 1000),
+                "load_seconds": load_seconds,
+            })
+            print(f"{backend:<8} threads {intra_threads}/{inter_threads} seq {results[-1]['seq_len']:>6.1f} "
+                  f"batch {batch_size:>3}: p50 {stats['p50_ms']:7.2f} ms, p99 {stats['p99_ms']:7.2f} ms, "
+                  f"{results[-1]['throughput']:8.1f} headlines/s", flush=True)
+    queue.put(results)
+
+
+def compare_with_baseline(report, baseline_path, tolerance):
+    """Print configurations whose throughput fell or p95 latency rose by more than tolerance."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(row):
+        return (row["backend"], row["intra_threads"], row["inter_threads"], row["input"],
+                row["seq_len"] if row["input"] == "synthetic" else "csv", row["batch_size"])
+
+    previous = {key(row): row for row in baseline["results"]}
+    regressions = 0
+    for row in report["results"]:
+        old = previous.get(key(row))
+        if old is None:
+            continue
+        throughput_change = row["throughput"] / old["throughput"] - 1
+        p95_change = row["p95_ms"] / old["p95_ms"] - 1
+        if throughput_change < -tolerance or p95_change > tolerance:
+            regressions += 1
+            print(f"REGRESSION {key(row)}: throughput {throughput_change:+.1%}, p95 {p95_change:+.1%}")
+    print(f"{regressions} regression(s) beyond {tolerance:.0%} against {baseline_path} "
+          f"(model version {baseline['meta']['model_version']} -> {report['meta']['model_version']})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the predict path across backends, batch sizes, "
+                                                 "sequence lengths and thread settings.")
+    parser.add_argument("--model-dir", default="./bert_malaysian_news_model_augmented")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--batch-sizes", type=parse_ints, default=[1, 8, 32, 128])
+    parser.add_argument("--seq-lens", type=parse_ints, default=[16, 32, 64, 128],
+                        help="Token lengths of synthetic headlines; empty string for CSV input only")
+    parser.add_argument("--input", default="latest_malaysian_news.csv",
+                        help="Headline CSV benchmarked at its real lengths; '' for synthetic input only")
+    parser.add_argument("--intra-threads", type=parse_ints, default=[1, os.cpu_count()])
+    parser.add_argument("--inter-threads", type=parse_ints, default=[1])
+    parser.add_argument("--batches", type=int, default=30, help="Timed batches per measurement point")
+    parser.add_argument("--output", default="inference_benchmark.json")
+    parser.add_argument("--baseline", help="Earlier --output JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    csv_headlines = []
+    if args.input:
+        csv_headlines = pd.read_csv(args.input)["title"].dropna().astype(str).tolist()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    failed = []
+    for backend in available_backends(args.model_dir, args.backends):
+        for intra_threads in args.intra_threads:
+            for inter_threads in args.inter_threads:
+                # A backend that crashes its process (a compile or ORT failure, running out of memory) is
+                # reported as failed and the remaining configurations still run
+                try:
+                    results.extend(run_in_process(context, run_config, (
+                        backend, args.model_dir, intra_threads, inter_threads, args.batch_sizes, args.seq_lens,
+                        csv_headlines, args.batches,
+                    )))
+                except ChildProcessError as e:
+                    print(f"FAILED {backend} (intra {intra_threads}, inter {inter_threads}): {e}")
+                    failed.append({"backend": backend, "intra_threads": intra_threads,
+                                   "inter_threads": inter_threads, "error": str(e)})
+
+    report = {
+        "meta": {
+            "model_dir": args.model_dir,
+            "model_version": model_version(args.model_dir),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "torch": torch.__version__,
+            "cpu_count": os.cpu_count(),
+            "machine": platform.platform(),
+            "input": args.input,
+        },
+        "results": results,
+        "failed": failed,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} measurements to {args.output}")
+
+    if args.baseline:
+        compare_with_baseline(report, args.baseline, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
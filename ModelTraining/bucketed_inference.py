@@ -0,0 +1,160 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+from inference import DEFAULT_MODEL_DIR, LogitsOnly, load_model
+from labels import label_for
+from profiling import latency_stats
+
+# Sequence lengths a headline is padded up to; the last one is the tokenizer max_length
+BUCKETS = (16, 32, 64, 128)
+GRAPH_MODES = ("eager", "trace", "compile")
+
+
+def bucket_for(length, buckets=BUCKETS):
+    for bucket in buckets:
+        if length <= bucket:
+            return bucket
+    return buckets[-1]
+
+
+# Pads each headline only up to the smallest bucket that fits it, with one pre-warmed graph per bucket,
+# so single-request latency follows headline length instead of always paying for 128 tokens
+class BucketedPredictor:
+    def __init__(self, tokenizer, model, buckets=BUCKETS, mode="eager", warmup_runs=3):
+        if mode not in GRAPH_MODES:
+            raise ValueError(f"Unknown graph mode {mode!r}; expected one of {GRAPH_MODES}")
+        self.tokenizer = tokenizer
+        self.buckets = tuple(sorted(buckets))
+        self.mode = mode
+        self.num_labels = model.config.num_labels
+        self.graphs = {}
+        self.warmup_seconds = {}
+
+        logits_model = LogitsOnly(model).eval()
+        if mode == "compile":
+            # Static shapes: dynamo specializes one graph per bucket as it is warmed below
+            compiled = torch.compile(logits_model, dynamic=False)
+        for bucket in self.buckets:
+            input_ids, attention_mask = self._example(bucket)
+            start = time.perf_counter()
+            with torch.inference_mode():
+                if mode == "trace":
+                    graph = torch.jit.freeze(torch.jit.trace(logits_model, (input_ids, attention_mask)))
+                elif mode == "compile":
+                    graph = compiled
+                else:
+                    graph = logits_model
+                for _ in range(warmup_runs):
+                    graph(input_ids, attention_mask)
+            self.graphs[bucket] = graph
+            self.warmup_seconds[bucket] = time.perf_counter() - start
+
+    def _example(self, bucket):
+        input_ids = torch.full((1, bucket), self.tokenizer.pad_token_id, dtype=torch.long)
+        input_ids[0, 0] = self.tokenizer.cls_token_id
+        input_ids[0, 1] = self.tokenizer.sep_token_id
+        attention_mask = torch.zeros((1, bucket), dtype=torch.long)
+        attention_mask[0, :2] = 1
+        return input_ids, attention_mask
+
+    def _pad(self, encodings, bucket):
+        input_ids = torch.full((len(encodings), bucket), self.tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(encodings), bucket), dtype=torch.long)
+        for row, ids in enumerate(encodings):
+            input_ids[row, :len(ids)] = torch.tensor(ids)
+            attention_mask[row, :len(ids)] = 1
+        return input_ids, attention_mask
+
+    def predict_proba(self, texts):
+        """Same contract as inference.predict_proba(); headlines are grouped and run per bucket."""
+        encodings = self.tokenizer([str(text) for text in texts], max_length=self.buckets[-1],
+                                   truncation=True)["input_ids"]
+        groups = {}
+        for i, ids in enumerate(encodings):
+            groups.setdefault(bucket_for(len(ids), self.buckets), []).append(i)
+
+        probabilities = np.zeros((len(encodings), self.num_labels), dtype=np.float32)
+        with torch.inference_mode():
+            for bucket, indices in groups.items():
+                # Compiled graphs are specialized to batch size 1 as well, so run those one headline at a time
+                chunks = [[i] for i in indices] if self.mode == "compile" else [indices]
+                for chunk in chunks:
+                    logits = self.graphs[bucket](*self._pad([encodings[i] for i in chunk], bucket))
+                    probabilities[chunk] = torch.softmax(logits, dim=-1).numpy()
+        return probabilities
+
+    def predict(self, text):
+        """Category name for one headline, like streamlit_app.predict()."""
+        return label_for(self.predict_proba([text])[0])
+
+
+def headlines_by_bucket(texts, tokenizer, buckets=BUCKETS, per_bucket=100):
+    """Real headlines grouped by bucket, topped up with synthetic ones of a matching length where too few exist."""
+    lengths = [len(ids) for ids in tokenizer([str(text) for text in texts])["input_ids"]]
+    grouped = {bucket: [] for bucket in buckets}
+    for text, length in zip(texts, lengths):
+        grouped[bucket_for(length, buckets)].append(str(text))
+
+    words = " ".join(str(text) for text in texts[:50]).split()
+    for bucket in buckets:
+        if len(grouped[bucket]) < per_bucket:
+            lower = max([b for b in buckets if b < bucket], default=0)
+            # Word count that tokenizes to a length inside (lower, bucket]
+            n_words = max(1, (lower + bucket) // 2 - 2)
+            while n_words > 1 and len(tokenizer(" ".join(words[:n_words]))["input_ids"]) > bucket:
+                n_words -= 1
+            grouped[bucket] += [" ".join(np.roll(words, shift)[:n_words]) for shift in range(per_bucket)]
+        grouped[bucket] = grouped[bucket][:per_bucket]
+    return grouped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-headline latency per length bucket, vs padding to 128.")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--backend", default="fp32", choices=("fp32", "int8"))
+    parser.add_argument("--input", default="latest_malaysian_news.csv")
+    parser.add_argument("--modes", nargs="+", default=["eager", "trace"], choices=GRAPH_MODES)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--per-bucket", type=int, default=100)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    tokenizer, model = load_model(args.model_dir, backend=args.backend)
+    texts = pd.read_csv(args.input)["title"].dropna().astype(str).tolist()
+    grouped = headlines_by_bucket(texts, tokenizer, per_bucket=args.per_bucket)
+
+    # Baseline: what streamlit_app.predict() used to do, padding every headline to max_length
+    def padded_to_max(text):
+        inputs = tokenizer(text, return_tensors="pt", max_length=BUCKETS[-1], truncation=True, padding="max_length")
+        with torch.inference_mode():
+            model(inputs["input_ids"], attention_mask=inputs["attention_mask"])
+
+    predictors = {}
+    for mode in args.modes:
+        predictors[mode] = BucketedPredictor(tokenizer, model, mode=mode)
+        print(f"{mode}: warmed {len(BUCKETS)} buckets in {sum(predictors[mode].warmup_seconds.values()):.2f}s")
+
+    sample = [text for bucket in BUCKETS for text in grouped[bucket]]
+    reference = predictors[args.modes[0]].predict_proba(sample)
+    rows = []
+    for bucket in BUCKETS:
+        row = {"bucket": bucket, "headlines": len(grouped[bucket]),
+               "pad128_p50_ms": latency_stats(padded_to_max, grouped[bucket])["p50_ms"]}
+        for mode, predictor in predictors.items():
+            stats = latency_stats(lambda text: predictor.predict_proba([text]), grouped[bucket])
+            row[f"{mode}_p50_ms"] = stats["p50_ms"]
+            row[f"{mode}_p95_ms"] = stats["p95_ms"]
+        rows.append(row)
+
+    for mode, predictor in predictors.items():
+        print(f"{mode}: max |p - p_{args.modes[0]}| = {np.abs(predictor.predict_proba(sample) - reference).max():.2e}")
+    print(f"\nSingle-headline latency per bucket ({args.threads} thread(s)):")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import random
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+import torch.distributed as dist
+
+from distributed import get_world_size, is_distributed, is_main_process
+
+
+def _rank():
+    return dist.get_rank() if is_distributed() else 0
+
+
+def _to_cpu(obj):
+    """Deep-copy a (nested) state dict onto the CPU so training can keep mutating the originals."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {key: _to_cpu(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(value) for value in obj)
+    return obj
+
+
+def _rng_state():
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def _set_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+# Periodic full-state checkpoints written on a background thread
+class CheckpointManager:
+    """Each checkpoint is a step-NNNNNNNN directory holding the model/optimizer state (rank 0)
+    and one file per rank with its RNG states, epoch/step counters and running metrics."""
+
+    def __init__(self, directory, model, optimizer, every_n_steps=200, keep=2):
+        self.directory = directory
+        self.model = model
+        self.optimizer = optimizer
+        self.every_n_steps = every_n_steps
+        self.keep = keep
+        self.global_step = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+
+    def step(self, epoch, step, progress):
+        """Call after every optimizer step; saves once every `every_n_steps` global steps."""
+        self.global_step += 1
+        if self.every_n_steps and self.global_step % self.every_n_steps == 0:
+            self.save(epoch, step, progress)
+
+    def save(self, epoch, step, progress):
+        """Snapshot the state synchronously, then write it to disk without blocking training."""
+        # Only one write in flight; a slow disk throttles checkpointing rather than piling up copies
+        self.wait()
+
+        path = os.path.join(self.directory, f"step-{self.global_step:08d}")
+        rank_state = {
+            "epoch": epoch,
+            "step": step,
+            "global_step": self.global_step,
+            "rng": _rng_state(),
+            "progress": _to_cpu(progress),
+        }
+        shared_state = None
+        if is_main_process():
+            shared_state = {
+                "model": _to_cpu(self.model.state_dict()),
+                "optimizer": _to_cpu(self.optimizer.state_dict()),
+            }
+        self._pending = self._executor.submit(self._write, path, shared_state, rank_state)
+
+    def _write(self, path, shared_state, rank_state):
+        os.makedirs(path, exist_ok=True)
+        files = [(f"rank{_rank()}.pt", rank_state)]
+        if shared_state is not None:
+            files.append(("state.pt", shared_state))
+
+        # Write-then-rename so a checkpoint never contains a truncated file
+        for name, state in files:
+            tmp_path = os.path.join(path, f".{name}.tmp")
+            torch.save(state, tmp_path)
+            os.replace(tmp_path, os.path.join(path, name))
+
+        if is_main_process():
+            for old_path in self._checkpoint_dirs()[:-self.keep]:
+                shutil.rmtree(old_path, ignore_errors=True)
+        print(f"Checkpoint saved to {path}")
+
+    def wait(self):
+        """Block until the in-flight checkpoint write (if any) has finished."""
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+    def _checkpoint_dirs(self):
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(name for name in os.listdir(self.directory) if re.fullmatch(r"step-\d{8}", name))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _is_complete(self, path):
+        """True when the checkpoint holds the shared state and the file of every rank."""
+        names = ["state.pt"] + [f"rank{rank}.pt" for rank in range(get_world_size())]
+        return all(os.path.exists(os.path.join(path, name)) for name in names)
+
+    def restore(self):
+        """Load the newest complete checkpoint into the model and optimizer.
+
+        Rank 0 picks the checkpoint and broadcasts it, so every rank resumes from the same step even
+        when a crash left the newest checkpoint with only some of the ranks' files.
+        Returns the rank's saved state (epoch, step, progress), or None when there is nothing to resume.
+        RNG states are restored separately by restore_rng() once the resumed epoch's iterator exists.
+        """
+        chosen = [None]
+        if is_main_process():
+            chosen[0] = next((path for path in reversed(self._checkpoint_dirs()) if self._is_complete(path)), None)
+        if is_distributed():
+            dist.broadcast_object_list(chosen, src=0)
+        path = chosen[0]
+
+        if path is None:
+            print(f"No checkpoint found in {self.directory}; starting from scratch.")
+            return None
+
+        shared_state = torch.load(os.path.join(path, "state.pt"), map_location="cpu", weights_only=False)
+        rank_state = torch.load(os.path.join(path, f"rank{_rank()}.pt"), map_location="cpu", weights_only=False)
+        self.model.load_state_dict(shared_state["model"])
+        self.optimizer.load_state_dict(shared_state["optimizer"])
+        self.global_step = rank_state["global_step"]
+        print(f"Resuming from {path} (epoch {rank_state['epoch'] + 1}, step {rank_state['step']})")
+        return rank_state
+
+    @staticmethod
+    def restore_rng(rank_state):
+        _set_rng_state(rank_state["rng"])
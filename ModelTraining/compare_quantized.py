@@ -0,0 +1,82 @@
+import argparse
+import multiprocessing
+import time
+
+import pandas as pd
+
+from inference import BACKENDS, DEFAULT_MODEL_DIR
+from news_data import DATASETS, load_test_split
+from profiling import run_in_process
+
+
+def measure_backend(backend, model_dir, titles, labels, queue):
+    """Runs in a fresh process so each backend's RSS is measured on its own."""
+    import torch
+    from inference import load_model, predict_proba
+    from profiling import latency_stats, rss_mb
+
+    torch.set_num_threads(1)
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    # Without mmap the fp32 weights are read in full at load time, so the RSS delta is the model's real
+    # footprint rather than the few pages touched before the first inference
+    tokenizer, model = load_model(model_dir, backend=backend, mmap=False)
+    load_seconds = time.perf_counter() - start
+    rss_after_load = rss_mb()
+
+    start = time.perf_counter()
+    predictions = predict_proba(titles, tokenizer, model, batch_size=64).argmax(axis=1)
+    throughput = len(titles) / (time.perf_counter() - start)
+
+    # Single-headline latency, padded only to the headline's own length as the app's WarmModel.predict() does
+    latency = latency_stats(lambda text: predict_proba([text], tokenizer, model), titles[:200])
+    queue.put({
+        "backend": backend,
+        "accuracy": float((predictions == labels).mean()),
+        "predictions": predictions,
+        "p50_ms": latency["p50_ms"],
+        "p95_ms": latency["p95_ms"],
+        "batch_throughput": throughput,
+        "load_seconds": load_seconds,
+        "rss_model_mb": rss_after_load - rss_before,
+        "rss_peak_mb": rss_mb(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the int8 quantized backend with fp32 on the held-out split.")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--dataset", default="augmented", choices=list(DATASETS),
+                        help="Dataset the model was trained on; its held-out split is used")
+    args = parser.parse_args()
+
+    test_df = load_test_split(args.dataset)
+    titles = test_df["title"].astype(str).tolist()
+    labels = test_df["label_encoded"].to_numpy()
+    print(f"Comparing backends on {len(titles)} held-out headlines.")
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in BACKENDS:
+        # Both backends are needed for the comparison, so a measurement process that dies ends the run
+        try:
+            results.append(run_in_process(context, measure_backend, (backend, args.model_dir, titles, labels)))
+        except ChildProcessError as e:
+            raise SystemExit(f"Measuring the {backend} backend failed: {e}")
+
+    fp32_predictions = results[0]["predictions"]
+    for result in results:
+        result["agreement_with_fp32"] = float((result.pop("predictions") == fp32_predictions).mean())
+
+    report = pd.DataFrame(results)
+    print("\nBackend comparison (single-thread latency, p50/p95 per headline):")
+    print(report.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+
+    accuracy_drop = report.iloc[0]["accuracy"] - report.iloc[1]["accuracy"]
+    print(f"\nint8 accuracy drop vs fp32: {accuracy_drop:+.4f}; "
+          f"speedup p50: {report.iloc[0]['p50_ms'] / report.iloc[1]['p50_ms']:.2f}x; "
+          f"RSS saved: {report.iloc[0]['rss_model_mb'] - report.iloc[1]['rss_model_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from listing_fetcher import fetch_listing, full_link
+
+CONFIG_FILE = "crawl_sections.json"
+# Persistent index of every link seen so far and of each section's newest article, one per output CSV
+INDEX_FILE = "crawl_index_{}.json"
+# Defaults for fields a section in the config may leave out
+SECTION_DEFAULTS = {
+    "container": None,             # CSS selector of the element holding the links; None searches the whole page
+    "title_from": "data-content-title",  # attribute holding the headline, or "text" for the link text
+    "pagination": "load_more",     # "load_more" clicks #loadMorestories, "next_page" follows the "Page N" link
+    "fetch": "browser",            # "http" fetches "next_page" listings without a browser (see listing_fetcher.py)
+    "timeout": 10,                 # first wait for new links in seconds; later waits adapt to the site's pace
+    "max_timeout": 30,             # upper bound of the adapted wait
+    "output": None,                # CSV to write to; defaults to the config's "output"
+}
+
+
+def load_sections(path=CONFIG_FILE, categories=None, base_url=None):
+    """Sections from the config with defaults filled in, optionally only those in the given categories.
+
+    base_url replaces the config's, e.g. to crawl a local copy of the site.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    config["base_url"] = base_url or config["base_url"]
+    sections = []
+    for section in config["sections"]:
+        if categories and section["category"] not in categories:
+            continue
+        section = {**SECTION_DEFAULTS, **section}
+        section["url"] = config["base_url"] + section["url"] if section["url"].startswith("/") else section["url"]
+        section["output"] = section["output"] or config["output"]
+        sections.append(section)
+    return config, sections
+
+
+def link_selector(section):
+    """CSS selector of the section's article links, as the browser sees them."""
+    selector = f'a[data-list-type="{section["link_type"]}"]'
+    return f"{section['container']} {selector}" if section["container"] else selector
+
+
+# Reads the matching links from index `offset` on, straight from the browser's DOM: Load More appends
+# to the list, so after each click only the new nodes cross the WebDriver connection
+EXTRACT_SCRIPT = """
+const links = document.querySelectorAll(arguments[0]);
+const start = arguments[1] <= links.length ? arguments[1] : 0;
+const rows = [];
+for (let i = start; i < links.length; i++) {
+    const title = arguments[2] ? links[i].getAttribute(arguments[2]) : links[i].textContent;
+    rows.push([title || "", links[i].getAttribute("href") || ""]);
+}
+return [links.length, rows];
+"""
+
+
+def extract_new_articles(driver, section, base_url, offset, seen):
+    """(link count on the page, rows for links after `offset` not yet in `seen`)."""
+    title_attribute = None if section["title_from"] == "text" else section["title_from"]
+    count, links = driver.execute_script(EXTRACT_SCRIPT, link_selector(section), offset, title_attribute)
+    rows = []
+    for title, href in links:
+        title, href = title.strip(), href.strip()
+        if not href or not title:
+            continue
+        link = full_link(href, base_url)
+        if seen.add(link):
+            rows.append({"title": title, "link": link, "label": section["label"]})
+    return count, rows
+
+
+# Links known to the crawler: loaded from the persistent index, plus those collected so far in this
+# crawl, shared by the section threads so a story listed on several pages or sections is only kept once
+class SeenLinks:
+    def __init__(self, links=()):
+        self._links = set(links)
+        self._lock = threading.Lock()
+
+    def add(self, link):
+        """True if the link had not been seen before."""
+        with self._lock:
+            if link in self._links:
+                return False
+            self._links.add(link)
+            return True
+
+    def all_known(self, links):
+        """True if every one of links has been seen already (and there is at least one)."""
+        links = list(links)
+        with self._lock:
+            return bool(links) and all(link in self._links for link in links)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(sorted(self._links))
+
+    def __len__(self):
+        return len(self._links)
+
+
+def index_path(output, directory="."):
+    """Index file of one output CSV, e.g. crawl_index_labeled_malaysian_news.json."""
+    return os.path.join(directory, INDEX_FILE.format(os.path.splitext(os.path.basename(output))[0]))
+
+
+def load_index(path, seed_csv):
+    """(SeenLinks, per-section high-water marks) from the index; a missing index is seeded from its CSV."""
+    if os.path.exists(path):
+        with open(path) as f:
+            index = json.load(f)
+        print(f"Loaded {len(index['links'])} known links from {path}.")
+        return SeenLinks(index["links"]), index["sections"]
+
+    links = set()
+    if os.path.exists(seed_csv):
+        links.update(pd.read_csv(seed_csv)["link"].dropna().astype(str))
+    print(f"No crawl index at {path}; seeded {len(links)} known links from {seed_csv}.")
+    return SeenLinks(links), {}
+
+
+def save_index(path, seen, marks):
+    # Written to a temporary file first so an interrupted crawl never leaves a truncated index
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump({"sections": marks, "links": list(seen)}, f, indent=1)
+    os.replace(temporary, path)
+
+
+def new_driver():
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1280,2000")
+    return webdriver.Chrome(options=options)
+
+
+# A fixed number of headless Chrome sessions shared by the section crawls; sessions are started
+# on first use and reused by later sections instead of one browser per script
+class BrowserPool:
+    def __init__(self, size, factory=new_driver):
+        self.size = size
+        self.factory = factory
+        self._idle = []
+        self._created = 0
+        # Woken when a browser is released or a start fails, so waiters never outlive a failed start
+        self._available = threading.Condition()
+        self._drivers = []
+
+    def acquire(self):
+        with self._available:
+            # A failed start frees its slot, which the next waiter takes over by starting a browser itself
+            while not self._idle and self._created >= self.size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+        with self._available:
+            self._drivers.append(driver)
+        return driver
+
+    def release(self, driver):
+        with self._available:
+            self._idle.append(driver)
+            self._available.notify()
+
+    def close(self):
+        for driver in self._drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"Error closing browser: {e}")
+
+
+# Wait limit that follows how long the site has recently taken to respond: `factor` times a moving
+# average of observed waits, kept between minimum and maximum seconds
+class AdaptiveTimeout:
+    def __init__(self, initial=10.0, minimum=2.0, maximum=30.0, factor=3.0, smoothing=0.3):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.smoothing = smoothing
+        self.average = initial / factor
+
+    @property
+    def seconds(self):
+        return min(self.maximum, max(self.minimum, self.factor * self.average))
+
+    def observe(self, seconds):
+        self.average += self.smoothing * (seconds - self.average)
+
+
+def wait_for_links(driver, section, previous_count, timeout, button=None):
+    """Block until the page holds more article links than previous_count.
+
+    Returns False on timeout, or as soon as the Load More button is replaced by nothing, which
+    means the list is exhausted.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    selector = link_selector(section)
+
+    def advanced(d):
+        if len(d.find_elements(By.CSS_SELECTOR, selector)) > previous_count:
+            return "links"
+        if button is not None and EC.staleness_of(button)(d) and not d.find_elements(By.ID, "loadMorestories"):
+            return "exhausted"
+        return False
+
+    start = time.perf_counter()
+    try:
+        outcome = WebDriverWait(driver, timeout.seconds, poll_frequency=0.1).until(advanced)
+    except TimeoutException:
+        return False
+    timeout.observe(time.perf_counter() - start)
+    return outcome == "links"
+
+
+def next_page(driver, section, page, link_count, timeout):
+    """Move to the next page of the section and wait for its links; False when there is none."""
+    from selenium.webdriver.common.by import By
+
+    if section["pagination"] == "next_page":
+        next_links = driver.find_elements(By.CSS_SELECTOR, f'a[data-content-title="Page {page + 1}"]')
+        href = next_links[0].get_attribute("href") if next_links else None
+        if not href:
+            return False
+        driver.get(href)
+        return wait_for_links(driver, section, 0, timeout)
+
+    buttons = driver.find_elements(By.ID, "loadMorestories")
+    if not buttons:
+        return False
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();", buttons[0])
+    return wait_for_links(driver, section, link_count, timeout, button=buttons[0])
+
+
+def crawl_section(pool, section, base_url, seen, incremental=True):
+    """All new rows of one section; runs on a pool thread with a browser of its own for its duration.
+
+    Listings are newest first, so when incremental the crawl stops at the first page whose links are
+    all known. wait_seconds is time spent loading pages and waiting for new links, parse_seconds time
+    spent extracting links from the page.
+    """
+    start = time.perf_counter()
+    timeout = AdaptiveTimeout(section["timeout"], maximum=section["max_timeout"])
+    driver = None
+    rows = []
+    pages = 0
+    link_count = 0
+    wait_seconds = parse_seconds = 0.0
+    stopped = "end"
+    try:
+        driver = pool.acquire()
+        load_start = time.perf_counter()
+        driver.get(section["url"])
+        wait_for_links(driver, section, 0, timeout)
+        wait_seconds += time.perf_counter() - load_start
+        for page in range(1, section["max_pages"] + 1):
+            parse_start = time.perf_counter()
+            # A "Page N" link loads a fresh page, a Load More click appends to the current one
+            offset = 0 if section["pagination"] == "next_page" else link_count
+            link_count, page_rows = extract_new_articles(driver, section, base_url, offset, seen)
+            parse_seconds += time.perf_counter() - parse_start
+            if link_count <= offset:
+                print(f"[{section['name']}] No articles found on page {page}. Stopping.")
+                break
+            rows.extend(page_rows)
+            pages = page
+            print(f"[{section['name']}] {link_count - offset} articles on page {page}, {len(page_rows)} new.")
+            if incremental and not page_rows:
+                stopped = "known"
+                break
+            if page == section["max_pages"]:
+                stopped = "max_pages"
+                break
+            wait_start = time.perf_counter()
+            advanced = next_page(driver, section, page, link_count, timeout)
+            wait_seconds += time.perf_counter() - wait_start
+            if not advanced:
+                break
+    except Exception as e:
+        print(f"[{section['name']}] An error occurred: {e}")
+        stopped = "error"
+    finally:
+        if driver is not None:
+            pool.release(driver)
+    return {"section": section["name"], "fetched_by": "browser", "pages": pages, "stopped": stopped, "rows": rows,
+            "seconds": time.perf_counter() - start, "wait_seconds": wait_seconds, "parse_seconds": parse_seconds}
+
+
+def fetch_section(section, base_url, seen, concurrency, incremental=True):
+    """Like crawl_section(), but over plain HTTP; None when the first page has no articles without JavaScript.
+
+    Pages are kept in order up to the first one without articles, or when incremental, without new ones.
+    """
+    start = time.perf_counter()
+    # Pages past one whose links are all known are not requested
+    is_done = (lambda rows: seen.all_known(row["link"] for row in rows)) if incremental else None
+    pages, wait_seconds, parse_seconds = asyncio.run(fetch_listing(section, base_url, concurrency, is_done=is_done))
+    if not pages.get(1):
+        return None
+    rows = []
+    page = 0
+    stopped = "end"
+    while pages.get(page + 1):
+        page += 1
+        page_rows = [row for row in pages[page] if seen.add(row["link"])]
+        rows.extend(page_rows)
+        if incremental and not page_rows:
+            stopped = "known"
+            break
+    if stopped == "end" and page == section["max_pages"]:
+        stopped = "max_pages"
+    print(f"[{section['name']}] {len(pages)} pages fetched over HTTP, {page} used, {len(rows)} new articles.")
+    return {"section": section["name"], "fetched_by": "http", "pages": page, "stopped": stopped, "rows": rows,
+            "seconds": time.perf_counter() - start, "wait_seconds": wait_seconds, "parse_seconds": parse_seconds}
+
+
+def save_rows(rows, output, labeled):
+    """Merge new rows into the CSV: labeled ones after the existing articles, latest news before them.
+
+    Returns False if the file could not be written.
+    """
+    new_data = pd.DataFrame(rows, columns=["title", "link", "label"])
+    if not labeled:
+        new_data = new_data.drop(columns=["label"])
+    try:
+        existing_data = pd.read_csv(output)
+        print(f"Loaded {len(existing_data)} existing articles from {output}.")
+    except FileNotFoundError:
+        existing_data = new_data.iloc[:0]
+    parts = [existing_data, new_data] if labeled else [new_data, existing_data]
+    combined_data = pd.concat(parts).drop_duplicates(subset=["title", "link"], keep="first")
+    try:
+        combined_data.to_csv(output, index=False)
+        print(f"Data saved to {output} with {len(combined_data)} unique articles ({len(rows)} new).")
+    except PermissionError:
+        print(f"Permission denied: Unable to write to {output}. Ensure the file is closed.")
+        return False
+    return True
+
+
+def update_marks(marks, results):
+    """Record each section's newest article (its high-water mark) and how its latest crawl went."""
+    now = time.strftime("%Y-%m-%dT%H:%M:%S")
+    for result in results:
+        mark = marks.setdefault(result["section"], {})
+        if result["rows"]:
+            # Rows are in page order and listings are newest first
+            mark.update(newest_link=result["rows"][0]["link"], newest_title=result["rows"][0]["title"], found_at=now)
+        mark.update(checked_at=now, pages=result["pages"], stopped=result["stopped"],
+                    new_articles=len(result["rows"]))
+
+
+def crawl(sections, base_url, browsers, http_concurrency=8, seen=None, incremental=True):
+    """Crawl sections concurrently on at most `browsers` browser sessions; returns each section's result.
+
+    "http" sections are fetched without a browser and only fall back to one when that finds nothing.
+    seen maps each output CSV to the SeenLinks already known for it, which are skipped and, when
+    incremental, end a section's crawl. Sections writing to different CSVs never claim each other's links.
+    """
+    pool = BrowserPool(browsers)
+    seen = dict(seen or {})
+    for section in sections:
+        seen.setdefault(section["output"], SeenLinks())
+
+    def run(section):
+        section_seen = seen[section["output"]]
+        if section["fetch"] == "http":
+            result = fetch_section(section, base_url, section_seen, http_concurrency, incremental)
+            if result is not None:
+                return result
+            print(f"[{section['name']}] No articles over HTTP; falling back to the browser.")
+        return crawl_section(pool, section, base_url, section_seen, incremental)
+
+    http_sections = sum(section["fetch"] == "http" for section in sections)
+    try:
+        # HTTP sections get threads of their own, the browser sections share the pool's sessions
+        with ThreadPoolExecutor(max_workers=pool.size + http_sections) as executor:
+            # Longest sections first, so that none of them starts last and stretches the whole crawl
+            order = sorted(range(len(sections)), key=lambda i: -sections[i]["max_pages"])
+            futures = {i: executor.submit(run, sections[i]) for i in order}
+            return [futures[i].result() for i in range(len(sections))]
+    finally:
+        pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl the news sections defined in the config concurrently.")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--categories", nargs="+", help="Only crawl sections of these categories")
+    parser.add_argument("--browsers", type=int, help="Headless browser sessions (default: the config's)")
+    parser.add_argument("--http-concurrency", type=int,
+                        help="Parallel keep-alive connections per HTTP-fetched section (default: the config's)")
+    parser.add_argument("--base-url", help="Crawl this site instead of the config's base_url, e.g. a local copy")
+    parser.add_argument("--index-dir", help="Directory of the per-CSV indexes of known links and high-water marks "
+                                            "(default: the config's index_dir, or the current directory)")
+    parser.add_argument("--full", action="store_true",
+                        help="Walk every page up to max_pages instead of stopping at the first fully known page")
+    args = parser.parse_args(argv)
+
+    config, sections = load_sections(args.config, args.categories, args.base_url)
+    if not sections:
+        parser.error(f"No sections of categories {args.categories} in {args.config}")
+
+    # One index per output CSV, seeded only from that CSV, so links of the latest news never count as
+    # known for the labeled sections or the other way round
+    index_dir = args.index_dir or config.get("index_dir", ".")
+    outputs = list(dict.fromkeys(section["output"] for section in sections))
+    seen, marks = {}, {}
+    for output in outputs:
+        seen[output], marks[output] = load_index(index_path(output, index_dir), output)
+
+    browser_sections = sum(section["fetch"] == "browser" for section in sections)
+    browsers = max(1, min(browser_sections, args.browsers or config.get("browsers", 4)))
+    start = time.perf_counter()
+    results = crawl(sections, config["base_url"], browsers, args.http_concurrency or config.get("http_concurrency", 8),
+                    seen=seen, incremental=not args.full)
+    elapsed = time.perf_counter() - start
+
+    by_output = {}
+    for section, result in zip(sections, results):
+        by_output.setdefault((section["output"], section["label"] is not None), []).extend(result["rows"])
+    saved = {output: True for output in outputs}
+    for (output, labeled), rows in by_output.items():
+        saved[output] = save_rows(rows, output, labeled) and saved[output]
+    # Links only count as known once they are in a CSV, so an unwritable CSV leaves its index untouched
+    for output in outputs:
+        if saved[output]:
+            path = index_path(output, index_dir)
+            update_marks(marks[output], [result for section, result in zip(sections, results)
+                                         if section["output"] == output])
+            save_index(path, seen[output], marks[output])
+            print(f"Index {path} now holds {len(seen[output])} links.")
+
+    report = pd.DataFrame([
+        {"section": result["section"], "fetched_by": result["fetched_by"], "pages": result["pages"],
+         "stopped": result["stopped"], "articles": len(result["rows"]), "seconds": result["seconds"],
+         "wait_seconds": result["wait_seconds"], "parse_seconds": result["parse_seconds"]}
+        for result in results
+    ])
+    print(f"\n{report.to_string(index=False, float_format=lambda value: f'{value:.2f}')}")
+    print(f"Crawled {len(sections)} sections in {elapsed:.1f}s with up to {browsers} browser(s); one after another "
+          f"they took {report['seconds'].sum():.1f}s, the slowest {report['seconds'].max():.1f}s.")
+    print(f"Waiting for pages: {report['wait_seconds'].sum():.1f}s, parsing: {report['parse_seconds'].sum():.1f}s "
+          f"(summed over sections).")
+
+
+if __name__ == "__main__":
+    main()
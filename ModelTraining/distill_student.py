@@ -0,0 +1,209 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+from sklearn.model_selection import train_test_split
+
+from dynamic_padding import DynamicPaddingCollator, LengthBucketSampler
+from metrics import MetricTracker
+from profiling import directory_mb, latency_stats, parameter_mb, rss_mb
+from tokenized_cache import NewsDataset, load_or_tokenize
+
+TEACHER_DIR = "bert_malaysian_news_model_augmented"
+STUDENT_DIR = "bert_malaysian_news_student"
+
+
+# NewsDataset that also yields the teacher's logits for each title
+class DistillationDataset(NewsDataset):
+    def __init__(self, encodings, indices, labels, teacher_logits):
+        super().__init__(encodings, indices, labels)
+        self.teacher_logits = teacher_logits
+
+    def __getitem__(self, idx):
+        item = super().__getitem__(idx)
+        item["teacher_logits"] = self.teacher_logits[idx]
+        return item
+
+
+def load_titles():
+    """Labeled + augmented titles, encoded with the augmented script's label ids, plus its held-out split."""
+    augmented = pd.read_csv("augmented_malaysian_news.csv")
+    label_codes, label_names = pd.factorize(augmented["label"])
+    augmented["label_encoded"] = label_codes
+
+    # The teacher never saw this split, so it is the fair place to compare teacher and student
+    train_df, test_df = train_test_split(augmented, test_size=0.2, random_state=42)
+
+    labeled = pd.read_csv("labeled_malaysian_news.csv").dropna(subset=["title", "label"])
+    labeled = labeled[labeled["label"].isin(label_names)].copy()
+    labeled["label_encoded"] = label_names.get_indexer(labeled["label"])
+
+    train_df = pd.concat([train_df, labeled]).drop_duplicates(subset=["title"])
+    train_df = train_df[~train_df["title"].isin(set(test_df["title"]))]
+    return train_df.reset_index(drop=True), test_df.reset_index(drop=True), list(label_names)
+
+
+def make_loader(dataset, tokenizer, batch_size, shuffle):
+    sampler = LengthBucketSampler(dataset.lengths, batch_size=batch_size, shuffle=shuffle,
+                                  pool_size=50 if shuffle else None)
+    return DataLoader(dataset, batch_sampler=sampler, collate_fn=DynamicPaddingCollator(tokenizer.pad_token_id))
+
+
+def build_student(teacher, num_layers, hidden_size, num_heads):
+    """Fewer, narrower layers; same vocabulary, so the teacher's tokenizer is reused unchanged."""
+    config = BertConfig.from_dict(teacher.config.to_dict())
+    config.num_hidden_layers = num_layers
+    config.hidden_size = hidden_size
+    config.num_attention_heads = num_heads
+    config.intermediate_size = hidden_size * 4
+    student = BertForSequenceClassification(config)
+
+    # Start from the teacher's embeddings projected onto their top principal directions
+    with torch.no_grad():
+        for name in ("word_embeddings", "position_embeddings", "token_type_embeddings"):
+            teacher_weight = getattr(teacher.bert.embeddings, name).weight
+            _, _, components = torch.pca_lowrank(teacher_weight, q=min(hidden_size, *teacher_weight.shape))
+            projected = teacher_weight @ components[:, :hidden_size]
+            getattr(student.bert.embeddings, name).weight[:, :projected.size(1)] = projected
+    return student
+
+
+def teacher_logits_for(teacher, loader, num_rows, num_labels):
+    logits = torch.zeros((num_rows, num_labels))
+    teacher.eval()
+    with torch.no_grad():
+        for indices, batch in zip(loader.batch_sampler, loader):
+            logits[indices] = teacher(batch["input_ids"], attention_mask=batch["attention_mask"]).logits
+    return logits
+
+
+def distill(student, train_loader, epochs, lr, temperature, alpha):
+    optimizer = torch.optim.AdamW(student.parameters(), lr=lr)
+    metrics = MetricTracker(torch.device("cpu"))
+    for epoch in range(epochs):
+        student.train()
+        metrics.reset()
+        train_loader.batch_sampler.set_epoch(epoch)
+        for batch in train_loader:
+            optimizer.zero_grad()
+            logits = student(batch["input_ids"], attention_mask=batch["attention_mask"]).logits
+
+            # Soft targets from the teacher plus the hard labels
+            soft_loss = F.kl_div(
+                F.log_softmax(logits / temperature, dim=-1),
+                F.softmax(batch["teacher_logits"] / temperature, dim=-1),
+                reduction="batchmean",
+            ) * temperature ** 2
+            hard_loss = F.cross_entropy(logits, batch["label"])
+            loss = alpha * soft_loss + (1 - alpha) * hard_loss
+
+            loss.backward()
+            optimizer.step()
+            metrics.update(logits, batch["label"], loss)
+
+        epoch_metrics = metrics.compute()
+        print(f"Epoch {epoch + 1}/{epochs}, Loss: {epoch_metrics['loss']:.4f}, Accuracy: {epoch_metrics['accuracy']:.4f}")
+
+
+def profile_model(name, model, model_dir, tokenizer, test_loader, test_titles, rss_delta):
+    model.eval()
+    metrics = MetricTracker(torch.device("cpu"))
+    with torch.no_grad():
+        for batch in test_loader:
+            metrics.update(model(batch["input_ids"], attention_mask=batch["attention_mask"]).logits, batch["label"])
+
+        # Single-headline latency, the way the Streamlit app calls predict()
+        def predict_one(text):
+            inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
+            model(inputs["input_ids"], attention_mask=inputs["attention_mask"])
+
+        latency = latency_stats(predict_one, test_titles[:200])
+
+        batches = list(test_loader)
+        start = time.perf_counter()
+        for batch in batches:
+            model(batch["input_ids"], attention_mask=batch["attention_mask"])
+        throughput = len(test_titles) / (time.perf_counter() - start)
+
+    return {
+        "model": name,
+        "layers": model.config.num_hidden_layers,
+        "hidden": model.config.hidden_size,
+        "params_m": sum(p.numel() for p in model.parameters()) / 1e6,
+        "weights_mb": parameter_mb(model),
+        "disk_mb": directory_mb(model_dir),
+        "rss_delta_mb": rss_delta,
+        "p50_ms": latency["p50_ms"],
+        "p95_ms": latency["p95_ms"],
+        "batch_throughput": throughput,
+        "accuracy": metrics.compute()["accuracy"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the augmented BERT classifier into a compact student.")
+    parser.add_argument("--teacher", default=TEACHER_DIR)
+    parser.add_argument("--output", default=STUDENT_DIR)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--hidden-size", type=int, default=384)
+    parser.add_argument("--heads", type=int, default=6)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--lr", type=float, default=1e-4)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.7, help="Weight of the soft (teacher) loss")
+    args = parser.parse_args()
+
+    train_df, test_df, label_names = load_titles()
+    print(f"Distilling on {len(train_df)} titles, evaluating on {len(test_df)} held-out titles.")
+
+    tokenizer = BertTokenizerFast.from_pretrained(args.teacher)
+    rss_before = rss_mb()
+    teacher = BertForSequenceClassification.from_pretrained(args.teacher)
+    teacher_rss = rss_mb() - rss_before
+
+    train_encodings = load_or_tokenize(train_df["title"], tokenizer, max_length=128)
+    test_encodings = load_or_tokenize(test_df["title"], tokenizer, max_length=128)
+    test_dataset = NewsDataset(test_encodings, np.arange(len(test_df)), test_df["label_encoded"])
+    test_loader = make_loader(test_dataset, tokenizer, 64, shuffle=False)
+
+    # Teacher logits are computed once, not every epoch
+    plain_train = NewsDataset(train_encodings, np.arange(len(train_df)), train_df["label_encoded"])
+    teacher_logits = teacher_logits_for(
+        teacher, make_loader(plain_train, tokenizer, 64, shuffle=False), len(train_df), teacher.config.num_labels
+    )
+    train_dataset = DistillationDataset(
+        train_encodings, np.arange(len(train_df)), train_df["label_encoded"], teacher_logits
+    )
+    train_loader = make_loader(train_dataset, tokenizer, args.batch_size, shuffle=True)
+
+    student = build_student(teacher, args.layers, args.hidden_size, args.heads)
+    student.config.id2label = dict(enumerate(label_names))
+    student.config.label2id = {name: i for i, name in enumerate(label_names)}
+    distill(student, train_loader, args.epochs, args.lr, args.temperature, args.alpha)
+
+    # Save in the same layout as the fine-tuned models so load_model() can use it directly
+    student.save_pretrained(args.output)
+    tokenizer.save_pretrained(args.output)
+    print(f"Student saved to {args.output}")
+
+    rss_before = rss_mb()
+    student = BertForSequenceClassification.from_pretrained(args.output)
+    student_rss = rss_mb() - rss_before
+
+    titles = test_df["title"].astype(str).tolist()
+    report = pd.DataFrame([
+        profile_model("teacher", teacher, args.teacher, tokenizer, test_loader, titles, teacher_rss),
+        profile_model("student", student, args.output, tokenizer, test_loader, titles, student_rss),
+    ])
+    print("\nTeacher vs student:")
+    print(report.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Multi-process data-parallel training on CPU with torch.distributed and the gloo backend.
+
+Any of the training scripts can be launched with torchrun and --distributed, e.g. on one Linux box:
+
+    torchrun --standalone --nproc_per_node=4 train_bert.py --distributed
+
+or across CPU nodes (run on every node with its own --node_rank):
+
+    torchrun --nnodes=2 --nproc_per_node=8 --node_rank=0 --master_addr=10.0.0.1 --master_port=29500 \\
+        train_bert.py --distributed
+
+Run once without --distributed (or with --nproc_per_node=1), and without --bf16, --compile or --resume,
+to record the single-process baseline that the scaling efficiency report compares against. Each script
+keeps its own baseline, since the datasets differ in size.
+"""
+import json
+import os
+from contextlib import contextmanager
+
+import torch.distributed as dist
+
+# Single-process throughput recorded for the scaling efficiency report, one file per training script
+SCALING_BASELINE_FILE = "scaling_baseline_{}.json"
+
+
+def init_distributed():
+    """Join the process group described by torchrun's environment variables; returns (rank, world_size)."""
+    if not dist.is_initialized():
+        dist.init_process_group(backend="gloo")
+    return dist.get_rank(), dist.get_world_size()
+
+
+def cleanup_distributed():
+    if dist.is_initialized():
+        dist.destroy_process_group()
+
+
+def is_distributed():
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_world_size():
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def is_main_process():
+    return not is_distributed() or dist.get_rank() == 0
+
+
+@contextmanager
+def main_process_first():
+    """Let rank 0 populate shared caches before the other ranks read them."""
+    if is_distributed() and not is_main_process():
+        dist.barrier()
+    yield
+    if is_distributed() and is_main_process():
+        dist.barrier()
+
+
+def report_scaling(samples_per_second, baseline_file, record=True):
+    """Record single-process throughput, or compare multi-process throughput against that record.
+
+    record=False leaves the baseline alone, e.g. for bf16, compiled or resumed runs.
+    """
+    world_size = get_world_size()
+    if world_size == 1:
+        if not record:
+            return
+        with open(baseline_file, "w") as f:
+            json.dump({"samples_per_second": samples_per_second}, f)
+        print(f"Single-process baseline of {samples_per_second:.1f} samples/s saved to {baseline_file}.")
+        return
+
+    if not os.path.exists(baseline_file):
+        print(f"No single-process baseline in {baseline_file}; run once without --distributed to record one.")
+        return
+
+    with open(baseline_file) as f:
+        baseline = json.load(f)["samples_per_second"]
+    speedup = samples_per_second / baseline
+    print(f"Scaling: {world_size} processes at {samples_per_second:.1f} samples/s vs {baseline:.1f} single-process "
+          f"({speedup:.2f}x speedup, {speedup / world_size:.1%} efficiency)")
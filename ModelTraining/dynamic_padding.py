@@ -0,0 +1,97 @@
+import math
+
+import torch
+from torch.utils.data import Sampler
+
+
+# Pad each batch only to its longest sequence instead of a fixed max_length
+class DynamicPaddingCollator:
+    def __init__(self, pad_token_id=0):
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, samples):
+        batch_length = max(len(sample["input_ids"]) for sample in samples)
+        input_ids = torch.full((len(samples), batch_length), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(samples), batch_length), dtype=torch.long)
+
+        for i, sample in enumerate(samples):
+            length = len(sample["input_ids"])
+            input_ids[i, :length] = sample["input_ids"]
+            attention_mask[i, :length] = 1
+
+        batch = {"input_ids": input_ids, "attention_mask": attention_mask}
+
+        # Per-sample tensors such as labels or teacher logits are stacked unchanged
+        for key in samples[0]:
+            if key != "input_ids":
+                batch[key] = torch.stack([sample[key] for sample in samples])
+        return batch
+
+
+# Group titles of similar length into the same batch while keeping epochs random
+class LengthBucketSampler(Sampler):
+    def __init__(self, lengths, batch_size, shuffle=True, pool_size=50, drop_last=False, seed=42, sampler=None):
+        """Sort each pool of `pool_size` batches by length; pool_size=None sorts the whole dataset.
+
+        When `sampler` is given (e.g. a DistributedSampler), indices are drawn from it instead of
+        a full permutation, so each rank only buckets its own shard.
+        """
+        self.lengths = lengths
+        self.sampler = sampler
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.pool_size = pool_size
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+        self.start_batch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        if hasattr(self.sampler, "set_epoch"):
+            self.sampler.set_epoch(epoch)
+
+    def set_start_batch(self, start_batch):
+        """Skip the first `start_batch` batches of the next epoch, e.g. when resuming mid-epoch."""
+        self.start_batch = start_batch
+
+    def _num_samples(self):
+        return len(self.lengths) if self.sampler is None else len(self.sampler)
+
+    def _pool_sizes(self, num_samples):
+        pool = num_samples if self.pool_size is None else self.batch_size * self.pool_size
+        return [min(pool, num_samples - start) for start in range(0, num_samples, max(pool, 1))]
+
+    def _batches(self):
+        generator = torch.Generator()
+        generator.manual_seed(self.seed + self.epoch)
+        if self.sampler is not None:
+            order = list(self.sampler)
+        elif self.shuffle:
+            order = torch.randperm(len(self.lengths), generator=generator).tolist()
+        else:
+            order = list(range(len(self.lengths)))
+
+        batches = []
+        start = 0
+        for pool_size in self._pool_sizes(len(order)):
+            pool = sorted(order[start:start + pool_size], key=lambda i: self.lengths[i])
+            start += pool_size
+            for i in range(0, len(pool), self.batch_size):
+                batch = pool[i:i + self.batch_size]
+                if len(batch) == self.batch_size or not self.drop_last:
+                    batches.append(batch)
+
+        # Shuffle whole batches so long and short ones are interleaved across the epoch
+        if self.shuffle:
+            batches = [batches[i] for i in torch.randperm(len(batches), generator=generator).tolist()]
+        return batches
+
+    def __iter__(self):
+        batches = self._batches()[self.start_batch:]
+        self.start_batch = 0
+        return iter(batches)
+
+    def __len__(self):
+        rounding = math.floor if self.drop_last else math.ceil
+        return sum(rounding(size / self.batch_size) for size in self._pool_sizes(self._num_samples()))
@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn.functional as F
+from safetensors.torch import load_file, save_file
+
+from distill_student import TEACHER_DIR, load_titles, make_loader
+from dynamic_padding import DynamicPaddingCollator
+from inference import load_model
+from labels import label_for
+from metrics import MetricTracker
+from profiling import latency_stats
+from tokenized_cache import NewsDataset, load_or_tokenize
+
+EARLY_EXIT_DIR = "bert_malaysian_news_early_exit"
+# Written next to the usual save_pretrained() files, which still load as a plain full-depth classifier
+EXIT_CONFIG = "early_exit.json"
+EXIT_HEADS = "exit_heads.safetensors"
+
+
+# Classifier on one intermediate layer's [CLS] state, shaped like BERT's own pooler + classifier
+class ExitHead(torch.nn.Module):
+    def __init__(self, hidden_size, num_labels, dropout=0.1):
+        super().__init__()
+        self.dense = torch.nn.Linear(hidden_size, hidden_size)
+        self.dropout = torch.nn.Dropout(dropout)
+        self.classifier = torch.nn.Linear(hidden_size, num_labels)
+
+    def forward(self, hidden_states):
+        pooled = torch.tanh(self.dense(hidden_states[:, 0]))
+        return self.classifier(self.dropout(pooled))
+
+
+# A fine-tuned BertForSequenceClassification with extra exit heads after some encoder layers.
+# forward() returns every exit's logits for joint training; exit_forward() stops each headline at the
+# first exit whose top probability reaches the threshold.
+class EarlyExitBert(torch.nn.Module):
+    def __init__(self, model, exit_layers):
+        super().__init__()
+        num_layers = model.config.num_hidden_layers
+        if not all(1 <= layer < num_layers for layer in exit_layers):
+            raise ValueError(f"Exit layers must lie between 1 and {num_layers - 1}; got {exit_layers}")
+        self.model = model
+        self.exit_layers = sorted(set(exit_layers))
+        self.heads = torch.nn.ModuleDict({
+            str(layer): ExitHead(model.config.hidden_size, model.config.num_labels,
+                                 model.config.hidden_dropout_prob)
+            for layer in self.exit_layers
+        })
+
+    @property
+    def config(self):
+        return self.model.config
+
+    def forward(self, input_ids, attention_mask):
+        """Logits of each intermediate exit in layer order, then the final classifier's."""
+        outputs = self.model.bert(input_ids, attention_mask=attention_mask, output_hidden_states=True)
+        # hidden_states[0] is the embedding output, hidden_states[i] the output of layer i
+        logits = [self.heads[str(layer)](outputs.hidden_states[layer]) for layer in self.exit_layers]
+        logits.append(self.model.classifier(self.model.dropout(outputs.pooler_output)))
+        return logits
+
+    def exit_forward(self, input_ids, attention_mask, threshold):
+        """(logits, layers executed) per headline; exited headlines are dropped from the batch."""
+        bert = self.model.bert
+        logits = torch.zeros((input_ids.size(0), self.config.num_labels))
+        layers = torch.full((input_ids.size(0),), self.config.num_hidden_layers, dtype=torch.long)
+        active = torch.arange(input_ids.size(0))
+        hidden = bert.embeddings(input_ids=input_ids)
+        # Additive (batch, 1, 1, seq) mask, accepted by both the eager and SDPA attention layers
+        mask = bert.get_extended_attention_mask(attention_mask, input_ids.shape)
+
+        for depth, layer in enumerate(bert.encoder.layer, start=1):
+            hidden = layer(hidden, attention_mask=mask)[0]
+            if str(depth) not in self.heads:
+                continue
+            exit_logits = self.heads[str(depth)](hidden)
+            done = torch.softmax(exit_logits, dim=-1).max(dim=-1).values >= threshold
+            if done.any():
+                logits[active[done]] = exit_logits[done]
+                layers[active[done]] = depth
+                keep = ~done
+                if not keep.any():
+                    return logits, layers
+                hidden, mask, active = hidden[keep], mask[keep], active[keep]
+
+        logits[active] = self.model.classifier(bert.pooler(hidden))
+        return logits, layers
+
+
+def save_early_exit(model, tokenizer, output_dir):
+    model.model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    save_file({name: tensor.contiguous() for name, tensor in model.heads.state_dict().items()},
+              os.path.join(output_dir, EXIT_HEADS))
+    with open(os.path.join(output_dir, EXIT_CONFIG), "w") as f:
+        json.dump({"exit_layers": model.exit_layers}, f)
+
+
+def load_early_exit(model_dir=EARLY_EXIT_DIR):
+    tokenizer, model = load_model(model_dir)
+    with open(os.path.join(model_dir, EXIT_CONFIG)) as f:
+        exit_layers = json.load(f)["exit_layers"]
+    early_exit = EarlyExitBert(model, exit_layers)
+    early_exit.heads.load_state_dict(load_file(os.path.join(model_dir, EXIT_HEADS)))
+    return tokenizer, early_exit.eval()
+
+
+def predict_proba(texts, tokenizer, model, threshold=0.9, batch_size=64, max_length=128):
+    """Like inference.predict_proba(), plus the number of encoder layers each headline ran through."""
+    texts = [str(text) for text in texts]
+    encodings = tokenizer(texts, max_length=max_length, truncation=True)["input_ids"]
+    order = np.argsort([len(ids) for ids in encodings], kind="stable")
+    probabilities = np.zeros((len(texts), model.config.num_labels), dtype=np.float32)
+    layers = np.zeros(len(texts), dtype=np.int64)
+    collator = DynamicPaddingCollator(pad_token_id=tokenizer.pad_token_id)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            batch = collator([{"input_ids": torch.tensor(encodings[i])} for i in indices])
+            logits, batch_layers = model.exit_forward(batch["input_ids"], batch["attention_mask"], threshold)
+            probabilities[indices] = torch.softmax(logits, dim=-1).numpy()
+            layers[indices] = batch_layers.numpy()
+    return probabilities, layers
+
+
+def predict(text, tokenizer, model, threshold=0.9):
+    """Category name for one headline, like streamlit_app.predict()."""
+    probabilities, _ = predict_proba([text], tokenizer, model, threshold=threshold)
+    return label_for(probabilities[0])
+
+
+def train_exits(model, train_loader, epochs, lr, freeze_backbone=False, exit_weight=0.5):
+    """Joint loss: the final head's at weight 1, plus the intermediate exits' sharing exit_weight by depth.
+
+    With exit_weight <= 1 the final head's loss outweighs all exits together, so the full-depth
+    classifier is not traded away for the early exits.
+    """
+    if freeze_backbone:
+        for param in model.model.parameters():
+            param.requires_grad = False
+    params = [param for param in model.parameters() if param.requires_grad]
+    optimizer = torch.optim.AdamW(params, lr=lr)
+    depths = torch.tensor(model.exit_layers, dtype=torch.float)
+    weights = torch.cat([exit_weight * depths / depths.sum(), torch.ones(1)])
+    metrics = MetricTracker(torch.device("cpu"))
+
+    for epoch in range(epochs):
+        model.train()
+        metrics.reset()
+        train_loader.batch_sampler.set_epoch(epoch)
+        for batch in train_loader:
+            optimizer.zero_grad()
+            all_logits = model(batch["input_ids"], batch["attention_mask"])
+            loss = sum(weight * F.cross_entropy(logits, batch["label"])
+                       for weight, logits in zip(weights, all_logits))
+            loss.backward()
+            optimizer.step()
+            metrics.update(all_logits[-1], batch["label"], loss)
+
+        epoch_metrics = metrics.compute()
+        print(f"Epoch {epoch + 1}/{epochs}, Loss: {epoch_metrics['loss']:.4f}, "
+              f"Final-head accuracy: {epoch_metrics['accuracy']:.4f}")
+    model.eval()
+
+
+def tradeoff_report(model, tokenizer, titles, labels, thresholds, latency_samples=200):
+    """Accuracy, average depth and latency for each threshold; threshold 1.01 never exits early."""
+    rows = []
+    for threshold in list(thresholds) + [1.01]:
+        start = time.perf_counter()
+        probabilities, layers = predict_proba(titles, tokenizer, model, threshold=threshold)
+        throughput = len(titles) / (time.perf_counter() - start)
+        latency = latency_stats(lambda text: predict_proba([text], tokenizer, model, threshold=threshold),
+                                titles[:latency_samples])
+        rows.append({
+            "threshold": "full" if threshold > 1 else threshold,
+            "accuracy": float((probabilities.argmax(axis=1) == labels).mean()),
+            "avg_layers": float(layers.mean()),
+            "exited_early": float((layers < model.config.num_hidden_layers).mean()),
+            "p50_ms": latency["p50_ms"],
+            "p95_ms": latency["p95_ms"],
+            "batch_throughput": throughput,
+        })
+    report = pd.DataFrame(rows)
+    report["speedup_p50"] = report["p50_ms"].iloc[-1] / report["p50_ms"]
+    report["accuracy_drop"] = report["accuracy"].iloc[-1] - report["accuracy"]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train exit heads on intermediate BERT layers and report the "
+                                                 "accuracy/latency trade-off of confidence-based early exit.")
+    parser.add_argument("--model-dir", default=TEACHER_DIR, help="Fine-tuned classifier to start from")
+    parser.add_argument("--output", default=EARLY_EXIT_DIR)
+    parser.add_argument("--exit-layers", nargs="+", type=int, default=None,
+                        help="Encoder layers to attach exit heads to (default: every layer but the last)")
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--lr", type=float, default=2e-5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--freeze-backbone", action="store_true",
+                        help="Train only the exit heads, leaving the encoder and final head as they are")
+    parser.add_argument("--exit-weight", type=float, default=0.5,
+                        help="Total loss weight of the intermediate exits; the final head's is 1")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0.5, 0.7, 0.8, 0.9, 0.95, 0.99])
+    parser.add_argument("--threads", type=int, default=1, help="Torch threads for the latency measurements")
+    parser.add_argument("--report-only", action="store_true", help="Skip training and report on --output")
+    args = parser.parse_args()
+
+    train_df, test_df, _ = load_titles()
+    titles = test_df["title"].astype(str).tolist()
+    labels = test_df["label_encoded"].to_numpy()
+
+    if not args.report_only:
+        tokenizer, base = load_model(args.model_dir, mmap=False)
+        exit_layers = args.exit_layers or list(range(1, base.config.num_hidden_layers))
+        model = EarlyExitBert(base, exit_layers)
+        print(f"Training exits after layers {model.exit_layers} on {len(train_df)} titles.")
+
+        encodings = load_or_tokenize(train_df["title"], tokenizer, max_length=128)
+        train_dataset = NewsDataset(encodings, np.arange(len(train_df)), train_df["label_encoded"])
+        train_exits(model, make_loader(train_dataset, tokenizer, args.batch_size, shuffle=True),
+                    args.epochs, args.lr, freeze_backbone=args.freeze_backbone, exit_weight=args.exit_weight)
+        save_early_exit(model, tokenizer, args.output)
+        print(f"Early-exit model saved to {args.output}")
+
+    torch.set_num_threads(args.threads)
+    tokenizer, model = load_early_exit(args.output)
+    report = tradeoff_report(model, tokenizer, titles, labels, args.thresholds)
+    print(f"\nEarly exit on {len(titles)} held-out headlines ({model.config.num_hidden_layers} layers, "
+          f"exits after {model.exit_layers}; single-headline latency at {args.threads} thread(s)):")
+    print(report.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+from transformers import BertModel, BertTokenizerFast
+
+from dynamic_padding import DynamicPaddingCollator, LengthBucketSampler
+from tokenized_cache import NewsDataset, cache_key, load_or_tokenize
+
+# Directory holding one memory-mapped embedding matrix per cache key
+CACHE_DIR = "embedding_cache"
+
+
+def _pool(outputs, attention_mask, pooling):
+    if pooling == "cls":
+        return outputs.last_hidden_state[:, 0]
+    if pooling == "pooler":
+        return outputs.pooler_output
+    # Mean over real tokens only
+    mask = attention_mask.unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+    return (outputs.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+
+
+def load_or_embed(texts, model_name="bert-base-uncased", max_length=128, pooling="mean",
+                  batch_size=64, cache_dir=CACHE_DIR):
+    """Return a memory-mapped (num_texts, hidden_size) matrix of frozen-encoder embeddings.
+
+    The encoder only runs on a cache miss; the key covers the model, pooling, max_length and titles.
+    """
+    texts = [str(text) for text in texts]
+    tokenizer = BertTokenizerFast.from_pretrained(model_name)
+    key_source = f"{model_name}|{pooling}|{cache_key(texts, tokenizer, max_length)}"
+    key = hashlib.sha1(key_source.encode("utf-8")).hexdigest()[:16]
+    entry_dir = os.path.join(cache_dir, key)
+
+    if os.path.exists(os.path.join(entry_dir, "meta.json")):
+        print(f"Loaded {len(texts)} embeddings from cache ({key}).")
+        return np.load(os.path.join(entry_dir, "embeddings.npy"), mmap_mode="r")
+
+    print(f"Encoding {len(texts)} titles with {model_name} (cache miss: {key})...")
+    encodings = load_or_tokenize(texts, tokenizer, max_length)
+    dataset = NewsDataset(encodings, np.arange(len(texts)), np.zeros(len(texts)))
+    sampler = LengthBucketSampler(dataset.lengths, batch_size=batch_size, shuffle=False, pool_size=None)
+    loader = DataLoader(dataset, batch_sampler=sampler, collate_fn=DynamicPaddingCollator(tokenizer.pad_token_id))
+
+    model = BertModel.from_pretrained(model_name)
+    model.eval()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir)
+    embeddings = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "embeddings.npy"), mode="w+", dtype=np.float32,
+        shape=(len(texts), model.config.hidden_size),
+    )
+
+    # Batches are sorted by length, so scatter each one back to its rows
+    with torch.no_grad():
+        for indices, batch in zip(sampler, loader):
+            outputs = model(batch["input_ids"], attention_mask=batch["attention_mask"])
+            embeddings[indices] = _pool(outputs, batch["attention_mask"], pooling).numpy()
+
+    embeddings.flush()
+    del embeddings
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump({"model": model_name, "pooling": pooling, "max_length": max_length, "num_texts": len(texts)}, f)
+
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return np.load(os.path.join(entry_dir, "embeddings.npy"), mmap_mode="r")
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import torch
+from transformers import BertTokenizerFast, BertForSequenceClassification
+
+from dynamic_padding import DynamicPaddingCollator
+from mmap_weights import load_mmap_model
+from quantization import load_quantized_model
+
+DEFAULT_MODEL_DIR = "./bert_malaysian_news_model_augmented"
+
+# Backends accepted by load_model()
+BACKENDS = ("fp32", "int8")
+
+
+def load_model(model_dir=DEFAULT_MODEL_DIR, backend="fp32", mmap=True):
+    tokenizer = BertTokenizerFast.from_pretrained(model_dir)
+    if backend == "int8":
+        model = load_quantized_model(model_dir)
+    elif backend == "fp32":
+        if mmap and os.path.exists(os.path.join(model_dir, "model.safetensors")):
+            model = load_mmap_model(model_dir)
+        else:
+            model = BertForSequenceClassification.from_pretrained(model_dir)
+    else:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+    model.eval()
+    return tokenizer, model
+
+
+# Returns plain logits, for exported and traced graphs that need a single tensor output
+class LogitsOnly(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def predict_proba(texts, tokenizer, model, batch_size=64, max_length=128):
+    """Class probabilities for many headlines, shape (len(texts), num_labels), in input order.
+
+    Texts are tokenized in one call without padding, sorted by length and padded per batch,
+    so short headlines never pay for the longest one in the input.
+    """
+    texts = [str(text) for text in texts]
+    encodings = tokenizer(texts, max_length=max_length, truncation=True)["input_ids"]
+    order = np.argsort([len(ids) for ids in encodings], kind="stable")
+    probabilities = np.zeros((len(texts), model.config.num_labels), dtype=np.float32)
+    collator = DynamicPaddingCollator(pad_token_id=tokenizer.pad_token_id)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            batch = collator([{"input_ids": torch.tensor(encodings[i])} for i in indices])
+            logits = model(batch["input_ids"], attention_mask=batch["attention_mask"]).logits
+            probabilities[indices] = torch.softmax(logits, dim=-1).numpy()
+    return probabilities
@@ -0,0 +1,111 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_URL = "http://127.0.0.1:8500"
+
+
+class InferenceError(Exception):
+    pass
+
+
+# Client for inference_server.py; one keep-alive session per thread
+class InferenceClient:
+    def __init__(self, url=DEFAULT_URL, timeout_ms=1000):
+        self.url = url.rstrip("/")
+        self.timeout_ms = timeout_ms
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _post(self, path, payload, timeout):
+        response = self._session().post(f"{self.url}{path}", json=payload, timeout=timeout)
+        if response.status_code != 200:
+            raise InferenceError(f"{response.status_code}: {response.json().get('error')}")
+        return response.json()
+
+    def predict_many(self, texts, variant=None, key=None):
+        """List of {"label", "confidence"} dicts, one per headline (plus "variant" and "version" with --variants).
+
+        variant picks a model served by the registry; key makes the server's A/B pick sticky, e.g. per user.
+        """
+        payload = {"texts": list(texts), "timeout_ms": self.timeout_ms}
+        if variant:
+            payload["variant"] = variant
+        if key:
+            payload["key"] = key
+        return self._post(
+            "/predict",
+            payload,
+            # Leave the server its own timeout plus time for the round trip
+            timeout=self.timeout_ms / 1000 + 5,
+        )["predictions"]
+
+    def predict(self, text, variant=None, key=None):
+        """Category name for one headline, like streamlit_app.predict()."""
+        return self.predict_many([text], variant, key)[0]["label"]
+
+    def stats(self):
+        return self._session().get(f"{self.url}/stats", timeout=5).json()
+
+    def models(self):
+        return self._session().get(f"{self.url}/models", timeout=5).json()
+
+    def swap(self, variant, model_dir):
+        """Point variant at model_dir; returns once the new model is loaded and serving."""
+        return self._post("/models/swap", {"variant": variant, "model_dir": model_dir}, timeout=600)
+
+    def set_traffic(self, weights):
+        return self._post("/models/traffic", {"weights": weights}, timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test inference_server.py with concurrent single-headline requests.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--input", default="latest_malaysian_news.csv")
+    parser.add_argument("--column", default="title")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--timeout-ms", type=float, default=1000)
+    args = parser.parse_args()
+
+    import numpy as np
+    import pandas as pd
+
+    headlines = pd.read_csv(args.input)[args.column].dropna().astype(str).tolist()
+    texts = [headlines[i % len(headlines)] for i in range(args.requests)]
+    client = InferenceClient(args.url, args.timeout_ms)
+    client.predict(texts[0])
+
+    def timed_request(text):
+        start = time.perf_counter()
+        try:
+            client.predict(text)
+            return (time.perf_counter() - start) * 1000, None
+        except InferenceError as error:
+            return (time.perf_counter() - start) * 1000, str(error)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(timed_request, texts))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, error in results if error is None])
+    errors = [error for _, error in results if error is not None]
+    print(f"{len(latencies)} ok, {len(errors)} failed in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.1f} requests/s at concurrency {args.concurrency})")
+    if len(latencies):
+        print("Latency ms: p50 {:.1f}, p95 {:.1f}, p99 {:.1f}".format(*np.percentile(latencies, [50, 95, 99])))
+    if errors:
+        print(f"First error: {errors[0]}")
+    print(f"Server stats: {client.stats()}")
+
+
+if __name__ == "__main__":
+    main()
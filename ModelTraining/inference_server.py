@@ -0,0 +1,412 @@
+"""Local micro-batching inference service for the headline classifier.
+
+Concurrent requests are queued and run through the model together: a batch is flushed once it
+holds --max-batch-size headlines or its first headline has waited --max-wait-ms. Start it with
+
+    python inference_server.py --backend onnx --port 8500
+
+and point clients at it, e.g. NEWS_INFERENCE_URL=http://127.0.0.1:8500 streamlit run streamlit_app.py.
+
+With --variants several models are served at once behind one shared tokenizer, e.g.
+
+    python inference_server.py --variants augmented class_weights --traffic augmented=0.9 class_weights=0.1
+
+Endpoints (JSON over HTTP/1.1, keep-alive):
+    POST /predict  {"text": "..."} or {"texts": [...]}  ->  {"predictions": [{"label", "confidence"}, ...]}
+                   optional "variant" to pick a model, or "key" for a sticky traffic-weighted A/B pick
+    GET  /models   variants, their versions and the traffic split
+    POST /models/swap     {"variant": "...", "model_dir": "..."}  load and atomically replace (or add) a variant
+    POST /models/traffic  {"weights": {"variant": weight, ...}}
+    GET  /stats    batching, queue, timeout and prediction cache counters
+    GET  /health
+A full queue answers 503 (backpressure) and a request still unanswered after its timeout answers 504.
+
+--workers N loads the weights once and forks N worker processes that share them read-only; the parent
+prints each process's unique and shared memory every --memory-report-interval seconds.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from labels import label_for
+from prediction_cache import PredictionCache, model_version
+from profiling import memory_breakdown
+
+
+class QueueFull(Exception):
+    pass
+
+
+# Collects single-headline requests into batches for one model
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0, max_queue=1024):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        # One model call at a time; the model parallelizes inside each batch
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.stats = {"requests": 0, "batches": 0, "batched_items": 0, "rejected": 0, "timed_out": 0, "errors": 0}
+
+    async def submit(self, text, timeout):
+        """Queue one headline and wait up to timeout seconds for its probabilities."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((text, future))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise QueueFull()
+        self.stats["requests"] += 1
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            # wait_for cancels the future, so the batch loop drops it if it has not run yet
+            self.stats["timed_out"] += 1
+            raise
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return [(text, future) for text, future in batch if not future.done()]
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+            texts = [text for text, _ in batch]
+            try:
+                probabilities = await loop.run_in_executor(self.executor, self.predict_fn, texts)
+            except Exception as error:
+                self.stats["errors"] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.stats["batches"] += 1
+            self.stats["batched_items"] += len(batch)
+            for (_, future), row in zip(batch, probabilities):
+                if not future.done():
+                    future.set_result(row)
+
+    def snapshot(self):
+        stats = dict(self.stats)
+        stats["queue_depth"] = self.queue.qsize()
+        stats["mean_batch_size"] = stats["batched_items"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+def build_predict_fn(model_dir, backend, threads=None):
+    """texts -> (len(texts), num_labels) probabilities for the chosen backend."""
+    if backend == "onnx":
+        from onnx_inference import OnnxPredictor, onnx_dir_for
+
+        predictor = OnnxPredictor(onnx_dir_for(model_dir), threads=threads)
+        return lambda texts: predictor.predict_proba(texts, batch_size=len(texts))
+
+    import torch
+    from inference import load_model, predict_proba
+
+    if threads:
+        torch.set_num_threads(threads)
+    tokenizer, model = load_model(model_dir, backend=backend)
+    return lambda texts: predict_proba(texts, tokenizer, model, batch_size=len(texts))
+
+
+def format_prediction(row):
+    return {"label": label_for(row), "confidence": float(row.max())}
+
+
+async def read_request(reader):
+    """Parse one HTTP/1.1 request; returns (method, path, headers, body) or None at end of stream."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return method, path, headers, body
+
+
+def write_response(writer, status, payload, keep_alive=True):
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 503: "Service Unavailable", 504: "Gateway Timeout"}
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+    )
+
+
+# Routes each headline to a model, answers from the prediction cache when it can and otherwise queues it on
+# that model's MicroBatcher. With a ModelRegistry, requests pick a variant (or a sticky A/B key) and
+# variants can be hot-swapped; without one there is a single model called "default".
+class InferenceServer:
+    def __init__(self, make_batcher, timeout_ms=1000, cache=None, registry=None, version=None, shared=False):
+        self.make_batcher = make_batcher
+        self.batchers = {}
+        self.timeout = timeout_ms / 1000
+        self.cache = cache
+        self.registry = registry
+        self.version = version
+        # One of several forked workers: a swap here would only reach this worker
+        self.shared = shared
+
+    def batcher(self, name):
+        if name not in self.batchers:
+            self.batchers[name] = self.make_batcher(name)
+        return self.batchers[name]
+
+    async def predict_one(self, text, timeout, variant=None, key=None):
+        if self.registry:
+            loaded = self.registry.route(variant, key)
+            name, version = loaded.name, loaded.version
+        else:
+            name, version = "default", self.version
+        # Keyed on the model version, so a swapped variant never answers from its predecessor's entries
+        if self.cache:
+            prediction = self.cache.get(text, version)
+            if prediction is not None:
+                return prediction
+        prediction = format_prediction(await self.batcher(name).submit(text, timeout))
+        if self.registry:
+            prediction.update(variant=name, version=version)
+        if self.cache:
+            self.cache.put(text, version, prediction)
+        return prediction
+
+    async def predict(self, body):
+        payload = json.loads(body or b"{}")
+        texts = payload["texts"] if "texts" in payload else [payload["text"]]
+        timeout = payload.get("timeout_ms", self.timeout * 1000) / 1000
+        variant, key = payload.get("variant"), payload.get("key")
+        if (variant or key) and not self.registry:
+            raise ValueError("variant routing needs the server to be started with --variants")
+        predictions = await asyncio.gather(*(self.predict_one(str(text), timeout, variant, key) for text in texts))
+        return {"predictions": predictions}
+
+    async def admin(self, path, body):
+        """Model management: swap a variant's weights or change the A/B traffic split."""
+        if not self.registry:
+            raise ValueError("model management needs the server to be started with --variants")
+        if self.shared:
+            raise ValueError("models cannot be changed at runtime with --workers; restart the server instead")
+        payload = json.loads(body or b"{}")
+        if path == "/models/swap":
+            # Loading runs off the event loop; requests keep being served by the current model meanwhile
+            await asyncio.to_thread(self.registry.swap, payload["variant"], payload["model_dir"])
+        elif path == "/models/traffic":
+            self.registry.set_traffic(payload["weights"])
+        return self.registry.describe()
+
+    def stats(self):
+        stats = {"batchers": {name: batcher.snapshot() for name, batcher in self.batchers.items()},
+                 "pid": os.getpid(), "memory": memory_breakdown()}
+        if self.cache:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except (asyncio.IncompleteReadError, ValueError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                if method == "POST" and path == "/predict":
+                    try:
+                        status, payload = 200, await self.predict(body)
+                    except QueueFull:
+                        status, payload = 503, {"error": "queue full, retry later"}
+                    except asyncio.TimeoutError:
+                        status, payload = 504, {"error": "prediction timed out"}
+                    except (KeyError, TypeError, ValueError) as error:
+                        status, payload = 400, {"error": f"bad request: {error}"}
+                elif method == "POST" and path in ("/models/swap", "/models/traffic"):
+                    try:
+                        status, payload = 200, await self.admin(path, body)
+                    except (KeyError, TypeError, ValueError, OSError) as error:
+                        status, payload = 400, {"error": f"bad request: {error}"}
+                elif method == "GET" and path == "/models":
+                    status, payload = 200, self.registry.describe() if self.registry else {"variants": {}}
+                elif method == "GET" and path == "/stats":
+                    status, payload = 200, self.stats()
+                elif method == "GET" and path == "/health":
+                    status, payload = 200, {"status": "ok"}
+                else:
+                    status, payload = 404, {"error": f"no route {method} {path}"}
+
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+def load_models(args, warmup=True):
+    """Load what args asks to serve; returns (variant name -> predict_fn factory, registry or None, version)."""
+    start = time.perf_counter()
+    if args.variants:
+        if args.backend == "onnx":
+            raise SystemExit("--variants serves torch backends (fp32 or int8)")
+        import torch
+        from model_registry import ModelRegistry, parse_variants
+
+        torch.set_num_threads(args.threads)
+        traffic = {name: float(weight) for name, _, weight in (spec.partition("=") for spec in args.traffic)}
+        registry = ModelRegistry(parse_variants(args.variants), backend=args.backend, traffic=traffic or None,
+                                 warmup=warmup)
+        print(f"Loaded variants {sorted(registry.describe()['variants'])} ({args.backend}) "
+              f"in {time.perf_counter() - start:.1f}s; traffic {registry.describe()['traffic']}")
+        return (lambda name: lambda texts: registry.predict_proba(texts, variant=name)[1]), registry, None
+
+    from onnx_inference import onnx_dir_for
+
+    predict_fn = build_predict_fn(args.model_dir, args.backend, args.threads)
+    version = model_version(onnx_dir_for(args.model_dir) if args.backend == "onnx" else args.model_dir, args.backend)
+    print(f"Loaded {args.model_dir} ({args.backend}) in {time.perf_counter() - start:.1f}s")
+    return (lambda name: predict_fn), None, version
+
+
+async def serve(args, models, sock=None):
+    predict_fn_for, registry, version = models
+    cache = None
+    if args.cache_size:
+        cache = PredictionCache(args.cache_size, args.cache_db, namespace="server", max_disk_rows=args.cache_db_rows)
+
+    batch_loops = []
+
+    def make_batcher(name):
+        batcher = MicroBatcher(predict_fn_for(name), args.max_batch_size, args.max_wait_ms, args.max_queue)
+        batch_loops.append(asyncio.create_task(batcher.run()))
+        return batcher
+
+    handler = InferenceServer(make_batcher, args.timeout_ms, cache, registry, version, shared=args.workers > 1)
+    if sock is not None:
+        server = await asyncio.start_server(handler.handle, sock=sock)
+    else:
+        server = await asyncio.start_server(handler.handle, args.host, args.port)
+        print(f"Serving on http://{args.host}:{args.port} "
+              f"(batch <= {args.max_batch_size}, wait <= {args.max_wait_ms} ms, queue <= {args.max_queue})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for batch_loop in batch_loops:
+            batch_loop.cancel()
+
+
+def print_memory_report(pids):
+    rows = []
+    for role, pid in pids:
+        try:
+            rows.append((role, pid, memory_breakdown(pid)))
+        except FileNotFoundError:
+            continue
+    print(f"{'process':<10} {'pid':>7} {'rss MB':>9} {'unique MB':>10} {'shared MB':>10} {'pss MB':>9}")
+    for role, pid, memory in rows:
+        print(f"{role:<10} {pid:>7} {memory['rss_mb']:9.1f} {memory['unique_mb']:10.1f} "
+              f"{memory['shared_mb']:10.1f} {memory['pss_mb']:9.1f}")
+    print(f"{'total':<10} {'':>7} {sum(m['rss_mb'] for _, _, m in rows):9.1f} "
+          f"{sum(m['unique_mb'] for _, _, m in rows):10.1f} {'':>10} {sum(m['pss_mb'] for _, _, m in rows):9.1f}"
+          "   (sum of pss = real footprint)", flush=True)
+
+
+def serve_workers(args):
+    """Load the weights once, then fork workers that share them read-only and accept on one listening socket.
+
+    fp32 weights are memory-mapped file pages and int8 weights are copy-on-write pages of the parent, so
+    neither is duplicated per worker. The parent runs no inference before forking, since an OpenMP thread
+    pool started before fork() is not usable in the children; ONNX Runtime sessions are likewise created
+    per worker.
+    """
+    models = None if args.backend == "onnx" else load_models(args, warmup=False)
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    workers = []
+    for worker in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            if "torch" in sys.modules:
+                sys.modules["torch"].set_num_threads(max(1, args.threads // args.workers))
+            asyncio.run(serve(args, models or load_models(args), sock))
+            os._exit(0)
+        workers.append(pid)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers {workers} "
+          f"(batch <= {args.max_batch_size}, wait <= {args.max_wait_ms} ms, queue <= {args.max_queue} per worker)")
+
+    try:
+        while True:
+            time.sleep(args.memory_report_interval)
+            print_memory_report([("parent", os.getpid())] + [(f"worker {i}", pid) for i, pid in enumerate(workers)])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+        for pid in workers:
+            os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the headline classifier with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8500)
+    parser.add_argument("--model-dir", default="./bert_malaysian_news_model_augmented")
+    parser.add_argument("--backend", default="fp32", choices=("fp32", "int8", "onnx"))
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-queue", type=int, default=1024, help="Pending headlines before requests get 503")
+    parser.add_argument("--timeout-ms", type=float, default=1000, help="Default per-request timeout")
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-size", type=int, default=10000, help="LRU prediction cache entries; 0 disables it")
+    parser.add_argument("--cache-db", help="SQLite file for a prediction cache tier that survives restarts")
+    parser.add_argument("--cache-db-rows", type=int, default=1000000,
+                        help="Rows kept in --cache-db; the least recently used beyond that are deleted")
+    parser.add_argument("--variants", nargs="*", default=[],
+                        help="Serve several models: NAME=MODEL_DIR, or base/class_weights/augmented for the trained ones")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes forked after loading the weights once; --threads is split among them")
+    parser.add_argument("--memory-report-interval", type=float, default=60,
+                        help="Seconds between per-process unique/shared memory reports with --workers")
+    parser.add_argument("--traffic", nargs="*", default=[],
+                        help="A/B split for requests without a variant, e.g. augmented=0.9 class_weights=0.1")
+    args = parser.parse_args()
+    if args.workers > 1:
+        serve_workers(args)
+        return
+    try:
+        asyncio.run(serve(args, load_models(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import numpy as np
+
+# Mapping of label indices to category names
+label_dict = {
+    0: "Business and Economy",
+    1: "Science & Technology",
+    2: "Environment",
+    3: "Education",
+    4: "World & Politics",
+    5: "People and Living",
+    6: "Travel & Culture",
+    7: "Sports",
+    8: "Crime",
+    9: "Entertainment & Style",
+    10: "Health and Family"
+}
+
+
+def label_for(probabilities):
+    """Category name of the most likely class in one headline's probabilities (or logits)."""
+    index = int(np.argmax(probabilities))
+    return label_dict.get(index, str(index))
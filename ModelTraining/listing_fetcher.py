@@ -0,0 +1,84 @@
+import asyncio
+import re
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Sent with every request; some listing pages refuse clients without a browser-like agent
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+PAGE_TITLE = re.compile(r"^Page (\d+)$")
+
+
+def full_link(href, base_url):
+    return f"{base_url}{href}" if href.startswith("/") else href
+
+
+def parse_listing(html, section, base_url):
+    """(article rows in page order, {page number: href} of the pager links) from a listing page.
+
+    Only <a> tags are built into the tree, which is all either result needs.
+    """
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("a"))
+    rows = []
+    for link in soup.find_all("a", attrs={"data-list-type": section["link_type"]}):
+        title = link.text if section["title_from"] == "text" else link.get(section["title_from"], "")
+        href = link.get("href", "").strip()
+        if not href or not title.strip():
+            continue
+        rows.append({"title": title.strip(), "link": full_link(href, base_url), "label": section["label"]})
+
+    pages = {}
+    for link in soup.find_all("a", attrs={"data-content-title": PAGE_TITLE}):
+        if link.get("href"):
+            pages[int(PAGE_TITLE.match(link["data-content-title"]).group(1))] = link["href"]
+    return rows, pages
+
+
+async def fetch_listing(section, base_url, concurrency=8, timeout=30, is_done=None):
+    """Fetch a paginated listing over HTTP, following its "Page N" links up to max_pages.
+
+    Every page number found on a fetched page's pager is requested right away, so pages are
+    downloaded in parallel over at most `concurrency` keep-alive connections. No page past one for
+    which is_done(rows) is true is requested. Returns the rows of each page by page number, plus the
+    summed request and parse seconds.
+    """
+    import aiohttp
+
+    pages = {}
+    timings = {"wait": 0.0, "parse": 0.0}
+
+    async def fetch(session, page, url):
+        start = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[{section['name']}] Page {page} ({url}) failed: {e!r}")
+            return page, [], {}
+        finally:
+            timings["wait"] += time.perf_counter() - start
+        start = time.perf_counter()
+        # Parsed off the event loop so that other pages keep downloading meanwhile
+        rows, pager = await asyncio.to_thread(parse_listing, html, section, base_url)
+        timings["parse"] += time.perf_counter() - start
+        return page, rows, pager
+
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT},
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        scheduled = {1}
+        last_page = section["max_pages"]
+        running = {asyncio.create_task(fetch(session, 1, section["url"]))}
+        while running:
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page, rows, pager = task.result()
+                pages[page] = rows
+                if is_done is not None and is_done(rows):
+                    last_page = min(last_page, page)
+                for number, href in pager.items():
+                    if number <= last_page and number not in scheduled:
+                        scheduled.add(number)
+                        running.add(asyncio.create_task(fetch(session, number, full_link(href, base_url))))
+    return pages, timings["wait"], timings["parse"]
@@ -0,0 +1,70 @@
+import numpy as np
+import torch
+import torch.distributed as dist
+from sklearn.metrics import classification_report
+
+
+# Running loss, accuracy and confusion matrix kept as tensors on the device
+class MetricTracker:
+    def __init__(self, device, num_classes=None):
+        """num_classes defaults to the width of the first logits passed to update()."""
+        self.device = device
+        self.num_classes = num_classes
+        self.reset()
+
+    def reset(self):
+        self.loss_sum = torch.zeros((), dtype=torch.float64, device=self.device)
+        self.num_batches = 0
+        self.confusion = None
+        if self.num_classes is not None:
+            self.confusion = torch.zeros((self.num_classes, self.num_classes), dtype=torch.long, device=self.device)
+
+    def update(self, logits, labels, loss=None):
+        """Accumulate one batch without moving anything to the host."""
+        if self.confusion is None:
+            self.num_classes = logits.size(1)
+            self.confusion = torch.zeros((self.num_classes, self.num_classes), dtype=torch.long, device=self.device)
+
+        preds = torch.argmax(logits.detach(), dim=1)
+        cells = labels * self.num_classes + preds
+        self.confusion += torch.bincount(cells, minlength=self.num_classes ** 2).view(self.num_classes, self.num_classes)
+
+        if loss is not None:
+            self.loss_sum += loss.detach().to(torch.float64)
+            self.num_batches += 1
+
+    def all_reduce(self):
+        """Sum the counters of every rank in place (one collective per call)."""
+        packed = torch.cat([self.loss_sum.view(1), self.confusion.view(-1).to(torch.float64),
+                            torch.tensor([self.num_batches], dtype=torch.float64, device=self.device)])
+        dist.all_reduce(packed)
+        self.loss_sum = packed[0].clone()
+        self.confusion = packed[1:-1].round().to(torch.long).view(self.num_classes, self.num_classes)
+        self.num_batches = int(packed[-1].item())
+
+    def state_dict(self):
+        return {"loss_sum": self.loss_sum, "num_batches": self.num_batches, "confusion": self.confusion}
+
+    def load_state_dict(self, state):
+        self.loss_sum = state["loss_sum"].to(self.device)
+        self.num_batches = state["num_batches"]
+        self.confusion = None if state["confusion"] is None else state["confusion"].to(self.device)
+        if self.confusion is not None:
+            self.num_classes = self.confusion.size(0)
+
+    def compute(self):
+        """Sync with the device once and return the running loss, accuracy and sample count."""
+        confusion = self.confusion.cpu().numpy()
+        total = int(confusion.sum())
+        return {
+            "loss": self.loss_sum.item() / self.num_batches if self.num_batches else 0.0,
+            "accuracy": float(np.trace(confusion)) / total if total else 0.0,
+            "samples": total,
+        }
+
+    def classification_report(self):
+        """Same output as sklearn's classification_report over the raw labels and predictions."""
+        confusion = self.confusion.cpu().numpy()
+        true_classes, pred_classes = np.nonzero(confusion)
+        counts = confusion[true_classes, pred_classes]
+        return classification_report(np.repeat(true_classes, counts), np.repeat(pred_classes, counts))
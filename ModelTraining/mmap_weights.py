@@ -0,0 +1,58 @@
+import json
+import os
+import struct
+
+import torch
+from transformers import BertConfig, BertForSequenceClassification
+from transformers.modeling_utils import no_init_weights
+
+# safetensors dtype names -> torch dtypes
+DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def mmap_safetensors(path):
+    """State dict whose tensors are views of a private, copy-on-write memory map of a safetensors file.
+
+    Nothing is read up front: pages are faulted in from the page cache the first time a layer runs,
+    and processes mapping the same file share those pages.
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    data_start = 8 + header_size
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+
+    state_dict = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        state_dict[name] = torch.empty(0, dtype=dtype).set_(
+            storage[data_start + begin:data_start + end], 0, info["shape"]
+        )
+    return state_dict
+
+
+def load_mmap_model(model_dir):
+    """BertForSequenceClassification for model_dir with its weights memory-mapped from model.safetensors.
+
+    The module is built without random initialization and its parameters are then swapped for the
+    mapped tensors, so no weight is copied or parsed at load time.
+    """
+    config = BertConfig.from_pretrained(model_dir)
+    with no_init_weights():
+        model = BertForSequenceClassification(config)
+    model.load_state_dict(mmap_safetensors(os.path.join(model_dir, "model.safetensors")), assign=True)
+    return model.eval()
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import random
+import threading
+import time
+
+from prediction_cache import model_version
+
+# The three fine-tuned classifiers produced by the training scripts
+VARIANTS = {
+    "base": "./bert_malaysian_news_model",
+    "class_weights": "./bert_malaysian_news_with_class_weights",
+    "augmented": "./bert_malaysian_news_model_augmented",
+}
+
+
+def parse_variants(specs):
+    """["name=model_dir", ...] -> {name: model_dir}; a bare name refers to VARIANTS."""
+    variants = {}
+    for spec in specs:
+        name, _, model_dir = spec.partition("=")
+        variants[name] = model_dir or VARIANTS[name]
+    return variants
+
+
+def _vocab_digest(model_dir):
+    """Identifies the tokenizer vocabulary; tokenizer.json also records padding settings, so only vocab.txt counts."""
+    with open(os.path.join(model_dir, "vocab.txt"), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# One loaded variant; immutable, so a request holding it is unaffected by a later swap
+class LoadedModel:
+    def __init__(self, name, model_dir, model, version):
+        self.name = name
+        self.model_dir = model_dir
+        self.model = model
+        self.version = version
+        self.loaded_at = time.time()
+
+
+# Serves several classifier variants side by side with one shared tokenizer.
+# Variants are replaced atomically with swap(); traffic can be split between them for A/B comparison.
+class ModelRegistry:
+    def __init__(self, variants, backend="fp32", traffic=None, warmup=True):
+        # Imported here so that the Streamlit app can read VARIANTS without loading torch
+        from transformers import BertTokenizerFast
+
+        self.backend = backend
+        self.warmup = warmup
+        first_dir = next(iter(variants.values()))
+        self.tokenizer = BertTokenizerFast.from_pretrained(first_dir)
+        self._vocab_digest = _vocab_digest(first_dir)
+        self._swap_lock = threading.Lock()
+        # Readers take a reference to the current dict without locking; writers replace the whole dict
+        self._models = {}
+        self._traffic = {}
+        self.requests = {}
+        for name, model_dir in variants.items():
+            self.swap(name, model_dir)
+        self.set_traffic(traffic or {next(iter(variants)): 1.0})
+
+    def _load(self, name, model_dir):
+        from inference import predict_proba
+        from mmap_weights import load_mmap_model
+        from quantization import load_quantized_model
+
+        if _vocab_digest(model_dir) != self._vocab_digest:
+            raise ValueError(f"{model_dir} uses a different tokenizer than the registry's shared one")
+        model = load_quantized_model(model_dir).eval() if self.backend == "int8" else load_mmap_model(model_dir)
+        loaded = LoadedModel(name, model_dir, model, model_version(model_dir, self.backend))
+        if self.warmup:
+            # Warm the new model up before it takes traffic
+            predict_proba(["Warmup headline for the news classifier"], self.tokenizer, model)
+        return loaded
+
+    def swap(self, name, model_dir):
+        """Load model_dir and make it variant `name`, adding the variant if new.
+
+        In-flight requests finish on the model they started with; the old one is freed after the last of them.
+        """
+        loaded = self._load(name, model_dir)
+        with self._swap_lock:
+            models = dict(self._models)
+            previous = models.get(name)
+            models[name] = loaded
+            self._models = models
+            self.requests.setdefault(name, 0)
+        print(f"Variant {name!r} now serves {model_dir} (version {loaded.version}"
+              f"{', replacing ' + previous.version if previous else ''})")
+        return loaded
+
+    def remove(self, name):
+        with self._swap_lock:
+            if self._traffic.get(name):
+                raise ValueError(f"Variant {name!r} still receives traffic; update set_traffic() first")
+            models = dict(self._models)
+            models.pop(name)
+            self._models = models
+
+    def set_traffic(self, weights):
+        """Split routed traffic between variants, e.g. {"augmented": 0.9, "class_weights": 0.1}."""
+        with self._swap_lock:
+            unknown = set(weights) - set(self._models)
+            if unknown:
+                raise ValueError(f"Unknown variants {sorted(unknown)}; loaded: {sorted(self._models)}")
+            total = sum(weights.values())
+            if total <= 0:
+                raise ValueError("At least one variant needs a positive traffic weight")
+            self._traffic = {name: weight / total for name, weight in weights.items() if weight > 0}
+
+    def route(self, variant=None, key=None):
+        """The variant to serve: the one asked for, or a traffic-weighted pick that is sticky per key."""
+        models = self._models
+        if variant is not None:
+            if variant not in models:
+                raise KeyError(f"Unknown variant {variant!r}; loaded: {sorted(models)}")
+            return models[variant]
+        if key is not None:
+            point = int(hashlib.sha1(str(key).encode("utf-8")).hexdigest()[:8], 16) / 16 ** 8
+        else:
+            point = random.random()
+        cumulative = 0.0
+        traffic = self._traffic
+        for name, weight in traffic.items():
+            cumulative += weight
+            if point < cumulative:
+                return models[name]
+        return models[next(reversed(traffic))]
+
+    def get(self, variant):
+        return self._models[variant]
+
+    def predict_proba(self, texts, variant=None, key=None):
+        """(LoadedModel that answered, probabilities) for a list of headlines."""
+        from inference import predict_proba
+
+        loaded = self.route(variant, key)
+        self.requests[loaded.name] = self.requests.get(loaded.name, 0) + len(texts)
+        return loaded, predict_proba(texts, self.tokenizer, loaded.model, batch_size=max(1, len(texts)))
+
+    def describe(self):
+        models = self._models
+        return {
+            "backend": self.backend,
+            "traffic": dict(self._traffic),
+            "variants": {
+                name: {"model_dir": loaded.model_dir, "version": loaded.version,
+                       "loaded_at": loaded.loaded_at, "requests": self.requests.get(name, 0)}
+                for name, loaded in models.items()
+            },
+        }
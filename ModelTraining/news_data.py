@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+# Datasets used by the full fine-tuning scripts, prepared the same way
+DATASETS = {
+    "labeled": "labeled_malaysian_news.csv",
+    "augmented": "augmented_malaysian_news.csv",
+}
+
+
+def load_dataset(name):
+    df = pd.read_csv(DATASETS[name])
+    if name == "labeled":
+        df.dropna(subset=["title", "label"], inplace=True)
+        df.drop_duplicates(inplace=True)
+        df.reset_index(drop=True, inplace=True)
+    df["label_encoded"] = pd.factorize(df["label"])[0]
+    return df
+
+
+def load_test_split(name):
+    """The 20% held-out split the training scripts evaluate on for dataset `name`."""
+    df = load_dataset(name)
+    _, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+    return df.iloc[test_idx].reset_index(drop=True)
@@ -0,0 +1,81 @@
+import argparse
+import os
+import shutil
+
+import numpy as np
+import torch
+from transformers import BertForSequenceClassification, BertTokenizerFast
+
+from inference import LogitsOnly, load_model, predict_proba
+from model_registry import VARIANTS
+from onnx_inference import ONNX_ROOT, OnnxPredictor, onnx_dir_for
+
+
+def export_onnx(model_dir, output_dir, opset=17):
+    """Export model_dir to output_dir/model.onnx with dynamic batch and sequence axes.
+
+    tokenizer.json and config.json are copied alongside, so the directory is all OnnxPredictor needs.
+    """
+    model = BertForSequenceClassification.from_pretrained(model_dir, attn_implementation="eager").eval()
+    tokenizer = BertTokenizerFast.from_pretrained(model_dir)
+    sample = tokenizer(["export sample headline", "a second, longer sample headline for export"],
+                       padding=True, return_tensors="pt")
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model),
+            (sample["input_ids"], sample["attention_mask"]),
+            path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+            dynamo=False,
+        )
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, "tokenizer.json"))
+    shutil.copy(os.path.join(model_dir, "config.json"), output_dir)
+    return path
+
+
+def check_export(model_dir, output_dir, texts):
+    """Largest absolute difference between PyTorch and ONNX Runtime probabilities on texts."""
+    tokenizer, model = load_model(model_dir)
+    expected = predict_proba(texts, tokenizer, model)
+    actual = OnnxPredictor(output_dir).predict_proba(texts)
+    return float(np.abs(expected - actual).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the fine-tuned classifiers to ONNX.")
+    parser.add_argument("model_dirs", nargs="*", default=list(VARIANTS.values()))
+    parser.add_argument("--output-root", default=ONNX_ROOT)
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--check-csv", default="latest_malaysian_news.csv",
+                        help="Headlines used to compare ONNX Runtime output against PyTorch")
+    args = parser.parse_args()
+
+    check_texts = None
+    if args.check_csv and os.path.exists(args.check_csv):
+        import pandas as pd
+        check_texts = pd.read_csv(args.check_csv)["title"].dropna().astype(str).head(256).tolist()
+
+    for model_dir in args.model_dirs:
+        if not os.path.isdir(model_dir):
+            print(f"Skipping {model_dir}: not found")
+            continue
+        output_dir = onnx_dir_for(model_dir, args.output_root)
+        path = export_onnx(model_dir, output_dir, opset=args.opset)
+        print(f"Exported {model_dir} to {path} ({os.path.getsize(path) / 2 ** 20:.1f} MB)")
+        if check_texts:
+            print(f"  max |p_torch - p_onnx| on {len(check_texts)} headlines: "
+                  f"{check_export(model_dir, output_dir, check_texts):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+import os
+
+import numpy as np
+
+from labels import label_for
+
+# Exported models live in ONNX_ROOT/<model directory name>, see onnx_export.py
+ONNX_ROOT = "onnx_models"
+
+
+def onnx_dir_for(model_dir, root=ONNX_ROOT):
+    return os.path.join(root, os.path.basename(os.path.normpath(model_dir)))
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+# Serves an exported classifier with ONNX Runtime; needs neither torch nor transformers
+class OnnxPredictor:
+    def __init__(self, onnx_dir, threads=None, max_length=128):
+        # Imported here so that importing this module (e.g. for onnx_dir_for) stays cheap
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(onnx_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(onnx_dir, "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.max_length = max_length
+        with open(os.path.join(onnx_dir, "config.json")) as f:
+            config = json.load(f)
+        self.num_labels = len(config["id2label"])
+        self.pad_token_id = config.get("pad_token_id") or 0
+
+    def _encode(self, texts, max_length):
+        self.tokenizer.enable_truncation(max_length)
+        return [encoding.ids for encoding in self.tokenizer.encode_batch([str(text) for text in texts])]
+
+    def _logits(self, encodings):
+        """Pad a batch to its own longest sequence and run it."""
+        length = max(len(ids) for ids in encodings)
+        input_ids = np.full((len(encodings), length), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, ids in enumerate(encodings):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        return self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+
+    def predict_proba(self, texts, batch_size=64, max_length=None):
+        """Same contract as inference.predict_proba(): (len(texts), num_labels) probabilities in input order."""
+        encodings = self._encode(texts, max_length or self.max_length)
+        order = np.argsort([len(ids) for ids in encodings], kind="stable")
+        probabilities = np.zeros((len(encodings), self.num_labels), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            probabilities[indices] = softmax(self._logits([encodings[i] for i in indices]))
+        return probabilities
+
+    def predict(self, text):
+        """Category name for one headline, like streamlit_app.predict()."""
+        return label_for(self.predict_proba([text])[0])
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_headline(text):
+    """Headlines differing only in case, Unicode form or whitespace share one cache entry."""
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def model_version(model_dir, backend="fp32"):
+    """Changes whenever any file in model_dir is replaced or rewritten, or the backend differs."""
+    entries = sorted(
+        (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+        for entry in os.scandir(model_dir) if entry.is_file()
+    )
+    key_source = json.dumps([os.path.abspath(model_dir), backend, entries])
+    return hashlib.sha1(key_source.encode("utf-8")).hexdigest()[:16]
+
+
+# Bounded LRU of predictions keyed on (model version, normalized headline), optionally backed by SQLite
+# so it survives restarts. Entries of different versions live side by side, so users of several backends
+# or variants can share one cache. namespace separates callers that store differently shaped values
+# (the Streamlit app stores category names, inference_server.py whole prediction dicts) in one SQLite file.
+# The SQLite tier keeps at most max_disk_rows rows per namespace, dropping the least recently used, so rows
+# of retrained or swapped-out model versions age out instead of piling up.
+class PredictionCache:
+    # Puts between two trims of the SQLite tier, so the table may briefly exceed max_disk_rows by this much
+    TRIM_EVERY = 1000
+
+    def __init__(self, maxsize=10000, disk_path=None, namespace="default", max_disk_rows=1000000):
+        self.maxsize = maxsize
+        self.namespace = namespace
+        self.max_disk_rows = max_disk_rows
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        self.puts_since_trim = 0
+        self.db = None
+        if disk_path:
+            self.db = sqlite3.connect(disk_path, check_same_thread=False)
+            with self.db:
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS prediction_cache (namespace TEXT, version TEXT, headline TEXT, "
+                    "value TEXT, last_used REAL, PRIMARY KEY (namespace, version, headline))"
+                )
+                columns = [row[1] for row in self.db.execute("PRAGMA table_info(prediction_cache)")]
+                if "last_used" not in columns:
+                    self.db.execute("ALTER TABLE prediction_cache ADD COLUMN last_used REAL DEFAULT 0")
+                self.db.execute(
+                    "CREATE INDEX IF NOT EXISTS prediction_cache_lru ON prediction_cache (namespace, last_used)"
+                )
+                self._trim_disk()
+
+    def get(self, text, version):
+        key = (version, normalize_headline(text))
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return self.entries[key]
+            if self.db:
+                row = self.db.execute(
+                    "SELECT value FROM prediction_cache WHERE namespace = ? AND version = ? AND headline = ?",
+                    (self.namespace, *key),
+                ).fetchone()
+                if row:
+                    # Memory hits leave last_used alone; rows read into memory are refreshed here instead
+                    with self.db:
+                        self.db.execute(
+                            "UPDATE prediction_cache SET last_used = ? "
+                            "WHERE namespace = ? AND version = ? AND headline = ?",
+                            (time.time(), self.namespace, *key),
+                        )
+                    self.counters["disk_hits"] += 1
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    return value
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, text, version, value):
+        key = (version, normalize_headline(text))
+        with self.lock:
+            self._remember(key, value)
+            if self.db:
+                with self.db:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO prediction_cache (namespace, version, headline, value, last_used) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (self.namespace, *key, json.dumps(value), time.time()),
+                    )
+                    self.puts_since_trim += 1
+                    if self.puts_since_trim >= self.TRIM_EVERY:
+                        self._trim_disk()
+
+    def _trim_disk(self):
+        """Delete this namespace's least recently used rows beyond max_disk_rows."""
+        deleted = self.db.execute(
+            "DELETE FROM prediction_cache WHERE rowid IN (SELECT rowid FROM prediction_cache WHERE namespace = ? "
+            "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.max_disk_rows),
+        ).rowcount
+        self.counters["disk_evictions"] += max(deleted, 0)
+        self.puts_since_trim = 0
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def get_or_compute(self, text, version, compute):
+        value = self.get(text, version)
+        if value is None:
+            value = compute(text)
+            self.put(text, version, value)
+        return value
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters, size=len(self.entries), maxsize=self.maxsize,
+                         versions=len({version for version, _ in self.entries}))
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,91 @@
+import os
+import queue
+import time
+
+import numpy as np
+
+
+def rss_mb(pid="self"):
+    """Current resident set size of a process in MB (Linux /proc)."""
+    with open(f"/proc/{pid}/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def parameter_mb(model):
+    """Memory taken by a model's parameters and buffers in MB."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors) / 2 ** 20
+
+
+def directory_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 2 ** 20
+
+
+def latency_stats(fn, inputs, warmup=3):
+    """Call fn on every input and return p50/p95/p99/mean latency in milliseconds."""
+    for item in inputs[:warmup]:
+        fn(item)
+
+    timings = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.asarray(timings)
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "mean_ms": float(timings.mean()),
+    }
+
+
+def memory_breakdown(pid="self"):
+    """Resident memory of a process in MB, split into pages only it maps (unique) and pages shared with others.
+
+    pss_mb divides each shared page among the processes mapping it, so summing it over workers gives their
+    real combined footprint, where summing rss_mb counts shared weights once per worker.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[0].endswith(":"):
+                fields[parts[0][:-1]] = int(parts[1]) / 1024
+    return {
+        "rss_mb": fields["Rss"],
+        "pss_mb": fields["Pss"],
+        "unique_mb": fields["Private_Clean"] + fields["Private_Dirty"],
+        "shared_mb": fields["Shared_Clean"] + fields["Shared_Dirty"],
+    }
+
+
+def run_in_process(context, target, args, poll_seconds=1.0):
+    """Run target(*args, result_queue) in a fresh process and return the one result it puts on the queue.
+
+    Raises ChildProcessError when the process exits without a result (an exception, a crash, an OOM kill)
+    instead of waiting for it forever.
+    """
+    result_queue = context.Queue()
+    process = context.Process(target=target, args=(*args, result_queue))
+    process.start()
+    try:
+        while True:
+            try:
+                return result_queue.get(timeout=poll_seconds)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+            # A result put just before the process exited may still be in flight
+            try:
+                return result_queue.get(timeout=poll_seconds)
+            except queue.Empty:
+                process.join()
+                raise ChildProcessError(f"{target.__name__} exited with code {process.exitcode} without a result")
+    finally:
+        process.join()
@@ -0,0 +1,49 @@
+import hashlib
+import os
+
+import torch
+from transformers import BertConfig, BertForSequenceClassification
+
+# Directory holding one quantized state dict per model directory and weights version
+CACHE_DIR = "quantized_cache"
+
+
+def _weights_file(model_dir):
+    for name in ("model.safetensors", "pytorch_model.bin"):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No model weights found in {model_dir}")
+
+
+def quantized_cache_path(model_dir, cache_dir=CACHE_DIR):
+    """Cache file keyed on the model directory, its weights file version and the torch version."""
+    weights = os.stat(_weights_file(model_dir))
+    key_source = f"{os.path.abspath(model_dir)}|{weights.st_size}|{weights.st_mtime_ns}|{torch.__version__}"
+    key = hashlib.sha1(key_source.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(os.path.normpath(model_dir))}-int8-{key}.pt")
+
+
+def quantize(model):
+    """Dynamic int8 quantization of every Linear layer; activations are quantized on the fly."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_quantized_model(model_dir, cache_dir=CACHE_DIR):
+    """Load the int8 model for model_dir, quantizing and caching it on first use."""
+    path = quantized_cache_path(model_dir, cache_dir)
+
+    if os.path.exists(path):
+        # Rebuild the quantized module structure from the config alone, then fill it from the cache;
+        # the fp32 weights are never read
+        model = quantize(BertForSequenceClassification(BertConfig.from_pretrained(model_dir)).eval())
+        model.load_state_dict(torch.load(path, weights_only=False))
+        return model.eval()
+
+    print(f"Quantizing {model_dir} to int8 (cache miss: {path})...")
+    model = quantize(BertForSequenceClassification.from_pretrained(model_dir).eval())
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(model.state_dict(), tmp_path)
+    os.replace(tmp_path, path)
+    return model
@@ -1,52 +1,94 @@
+import os
+import time
+import uuid
 import streamlit as st
-from transformers import BertTokenizer, BertForSequenceClassification
-import torch
+from model_registry import VARIANTS
+from onnx_inference import onnx_dir_for
+from prediction_cache import PredictionCache, model_version
+from warm_start import WarmModel
 
-# Load the model and tokenizer
+# torch, transformers and onnxruntime are only imported by WarmModel's background thread,
+# so the page renders before any of them (or the weights) have loaded
+APP_START = time.perf_counter()
+
+# Default model directory; point NEWS_MODEL_DIR at e.g. ./bert_malaysian_news_student to use the distilled model
+MODEL_DIR = os.environ.get("NEWS_MODEL_DIR", "./bert_malaysian_news_model_augmented")
+# Variants selectable in the sidebar: the trained models found on disk, plus MODEL_DIR
+MODEL_VARIANTS = {name: model_dir for name, model_dir in VARIANTS.items() if os.path.isdir(model_dir)}
+if os.path.normpath(MODEL_DIR) not in map(os.path.normpath, MODEL_VARIANTS.values()):
+    MODEL_VARIANTS["custom"] = MODEL_DIR
+DEFAULT_VARIANT = next(name for name, model_dir in MODEL_VARIANTS.items()
+                       if os.path.normpath(model_dir) == os.path.normpath(MODEL_DIR))
+# Default backend: "fp32", "int8" for the dynamically quantized model (see compare_quantized.py),
+# or "onnx" for the ONNX Runtime export of the model (see onnx_export.py)
+DEFAULT_BACKEND = os.environ.get("NEWS_MODEL_BACKEND", "fp32")
+SERVING_BACKENDS = ("fp32", "int8", "onnx")
+# Torch backends only: "eager", "trace" or "compile" pads to length buckets with a pre-warmed graph each
+# (see bucketed_inference.py); unset pads each headline to its own length
+GRAPH_MODE = os.environ.get("NEWS_GRAPH_MODE") or None
+# URL of inference_server.py; when set, predictions are micro-batched there instead of run in this process
+INFERENCE_URL = os.environ.get("NEWS_INFERENCE_URL")
+
+def served_dir(backend, variant=DEFAULT_VARIANT):
+    model_dir = MODEL_VARIANTS[variant]
+    return os.environ.get("NEWS_ONNX_DIR", onnx_dir_for(model_dir)) if backend == "onnx" else model_dir
+
+# Start loading once per backend, variant and model version, so retrained weights are picked up;
+# fp32 weights are memory-mapped
+@st.cache_resource(max_entries=len(SERVING_BACKENDS) * len(MODEL_VARIANTS))
+def load_model(backend=DEFAULT_BACKEND, variant=DEFAULT_VARIANT, version=None):
+    return WarmModel(served_dir(backend, variant), backend, graph_mode=GRAPH_MODE if backend != "onnx" else None)
+
+# Predictions keyed on the normalized headline; NEWS_CACHE_DB adds a SQLite tier that survives restarts,
+# holding at most NEWS_CACHE_DB_ROWS rows
 @st.cache_resource
-def load_model():
-    tokenizer = BertTokenizer.from_pretrained("./bert_malaysian_news_model_augmented")
-    model = BertForSequenceClassification.from_pretrained("./bert_malaysian_news_model_augmented")
-    return tokenizer, model
-
-tokenizer, model = load_model()
-
-# Set device to CPU (Streamlit sharing doesn't support GPU)
-device = torch.device("cpu")
-model.to(device)
-
-# Mapping of label indices to category names
-label_dict = {
-    0: "Business and Economy",
-    1: "Science & Technology",
-    2: "Environment",
-    3: "Education",
-    4: "World & Politics",
-    5: "People and Living",
-    6: "Travel & Culture",
-    7: "Sports",
-    8: "Crime",
-    9: "Entertainment & Style",
-    10: "Health and Family"
-}
-
-def predict(text):
-    inputs = tokenizer(text, return_tensors="pt", max_length=128, truncation=True, padding="max_length")
-    input_ids = inputs["input_ids"].to(device)
-    attention_mask = inputs["attention_mask"].to(device)
-
-    with torch.no_grad():
-        outputs = model(input_ids, attention_mask=attention_mask)
-        predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-        predicted_index = predictions.argmax().item()
-        return label_dict[predicted_index]  # Return the category name
+def load_cache():
+    return PredictionCache(int(os.environ.get("NEWS_CACHE_SIZE", 10000)), os.environ.get("NEWS_CACHE_DB"),
+                           namespace="app", max_disk_rows=int(os.environ.get("NEWS_CACHE_DB_ROWS", 1000000)))
+
+@st.cache_resource
+def load_client():
+    from inference_client import InferenceClient
+    return InferenceClient(INFERENCE_URL)
+
+def predict(text, backend=DEFAULT_BACKEND, variant=DEFAULT_VARIANT):
+    if INFERENCE_URL:
+        # The server keeps its own prediction cache; without a variant it picks one by its A/B traffic split,
+        # keyed on this session so a user keeps seeing the same model
+        return load_client().predict(text, variant=variant, key=st.session_state.session_key)
+    version = model_version(served_dir(backend, variant), backend)
+    return load_cache().get_or_compute(text, version,
+                                       lambda headline: load_model(backend, variant, version).predict(headline))
 
 # Streamlit user interface
 st.title('News Category Prediction')
+if INFERENCE_URL:
+    backend = None
+    st.session_state.setdefault("session_key", uuid.uuid4().hex)
+    st.sidebar.write(f"Served by {INFERENCE_URL}")
+    server_variants = sorted(load_client().models()["variants"])
+    variant = None
+    if server_variants:
+        choice = st.sidebar.selectbox("Model variant", ["A/B split"] + server_variants)
+        variant = None if choice == "A/B split" else choice
+else:
+    variant = st.sidebar.selectbox("Model variant", list(MODEL_VARIANTS),
+                                   index=list(MODEL_VARIANTS).index(DEFAULT_VARIANT))
+    backend = st.sidebar.selectbox("Model backend", SERVING_BACKENDS, index=SERVING_BACKENDS.index(DEFAULT_BACKEND))
+    # Kick off the background load as soon as the page is up
+    warm_model = load_model(backend, variant, model_version(served_dir(backend, variant), backend))
+    with st.sidebar.expander("Startup time"):
+        if warm_model.ready:
+            st.json({phase: f"{seconds * 1000:.0f} ms" for phase, seconds in warm_model.report().items()})
+        else:
+            st.write(f"Loading {backend} model in the background...")
+        st.write(f"Page rendered {(time.perf_counter() - APP_START) * 1000:.0f} ms after script start")
+    with st.sidebar.expander("Prediction cache"):
+        st.json(load_cache().stats())
 news_text = st.text_area("Enter a news headline:")
 if st.button("Classify"):
     if news_text.strip():  # Ensure input is not empty
-        label_name = predict(news_text)
+        label_name = predict(news_text, backend, variant)
         st.write(f"The predicted category is: {label_name}")
     else:
         st.write("Please enter a valid news headline.")
@@ -0,0 +1,219 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader
+from transformers import BertTokenizerFast, BertForSequenceClassification, AdamW
+from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_class_weight
+
+from dynamic_padding import DynamicPaddingCollator, LengthBucketSampler
+from news_data import load_dataset
+from tokenized_cache import NewsDataset, load_or_tokenize
+from training import evaluate_model, train_model
+
+# Hyperparameters hard-coded in the training scripts, widened into a search space
+DEFAULT_SPACE = {
+    "dataset": ["labeled"],
+    "class_weights": [True],
+    "lr": [1e-5, 2e-5, 3e-5, 5e-5],
+    "epochs": [3],
+    "batch_size": [16, 32],
+    "max_length": [64, 128],
+}
+
+
+def expand_trials(space, num_trials=None, seed=42):
+    """Every combination of the search space, or a random subset of num_trials of them."""
+    keys = list(space)
+    trials = [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+    if num_trials and num_trials < len(trials):
+        trials = random.Random(seed).sample(trials, num_trials)
+    return trials
+
+
+def share_array(array):
+    """Copy an array into a shared memory block; returns the block and a picklable spec for workers."""
+    array = np.ascontiguousarray(array)
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, {"name": block.name, "shape": array.shape, "dtype": array.dtype.str}
+
+
+def attach_array(spec):
+    block = SharedMemory(name=spec["name"])
+    return block, np.ndarray(spec["shape"], dtype=spec["dtype"], buffer=block.buf)
+
+
+# Median stopping rule: stop a trial whose accuracy trails the median of other trials at the same epoch.
+# Only trials of the same group are compared, e.g. those evaluated on the same dataset's test split.
+class MedianStopper:
+    def __init__(self, trial_id, test_loader, device, history, lock, group=None, grace_epochs=1, min_trials=3):
+        self.trial_id = trial_id
+        self.group = group
+        self.test_loader = test_loader
+        self.device = device
+        self.history = history
+        self.lock = lock
+        self.grace_epochs = grace_epochs
+        self.min_trials = min_trials
+        self.accuracies = []
+        self.stopped_early = False
+
+    def epoch_end(self, model, epoch, samples_per_second):
+        accuracy = evaluate_model(model, self.test_loader, self.device, verbose=False)
+        self.accuracies.append(accuracy)
+
+        with self.lock:
+            others = list(self.history.get((self.group, epoch), []))
+            self.history[(self.group, epoch)] = others + [accuracy]
+
+        if epoch + 1 <= self.grace_epochs or len(others) < self.min_trials:
+            return False
+        median = statistics.median(others)
+        if accuracy < median:
+            print(f"[trial {self.trial_id}] Stopping after epoch {epoch + 1}: accuracy {accuracy:.4f} < median {median:.4f}")
+            self.stopped_early = True
+            return True
+        return False
+
+
+def run_trial(trial_id, params, data, base_model, history, lock, threads):
+    torch.set_num_threads(threads)
+    device = torch.device("cpu")
+    start = time.perf_counter()
+
+    # Attach to the encodings tokenized once by the parent process
+    blocks = []
+    encodings = {}
+    for name in ("input_ids", "attention_mask"):
+        block, encodings[name] = attach_array(data[name])
+        blocks.append(block)
+
+    labels = data["labels"]
+    train_idx, test_idx = data["train_idx"], data["test_idx"]
+    train_dataset = NewsDataset(encodings, train_idx, labels[train_idx])
+    test_dataset = NewsDataset(encodings, test_idx, labels[test_idx])
+    collator = DynamicPaddingCollator(pad_token_id=data["pad_token_id"])
+    train_loader = DataLoader(
+        train_dataset,
+        batch_sampler=LengthBucketSampler(train_dataset.lengths, batch_size=params["batch_size"], shuffle=True),
+        collate_fn=collator,
+    )
+    test_loader = DataLoader(
+        test_dataset,
+        batch_sampler=LengthBucketSampler(test_dataset.lengths, batch_size=64, shuffle=False, pool_size=None),
+        collate_fn=collator,
+    )
+
+    model = BertForSequenceClassification.from_pretrained(base_model, num_labels=data["num_labels"])
+    optimizer = AdamW(model.parameters(), lr=params["lr"], eps=1e-8)
+    class_weights = None
+    if params["class_weights"]:
+        class_weights = torch.tensor(
+            compute_class_weight(class_weight="balanced", classes=np.arange(data["num_labels"]), y=labels),
+            dtype=torch.float,
+        )
+    loss_fn = torch.nn.CrossEntropyLoss(weight=class_weights)
+
+    # Accuracies on different datasets' test splits are not comparable
+    stopper = MedianStopper(trial_id, test_loader, device, history, lock, group=params["dataset"])
+    epoch_throughputs = train_model(
+        model, train_loader, loss_fn, optimizer, device, epochs=params["epochs"], report=stopper
+    )
+
+    del train_dataset, test_dataset, encodings
+    for block in blocks:
+        block.close()
+
+    return {
+        "trial": trial_id,
+        **params,
+        "accuracy": stopper.accuracies[-1],
+        "best_accuracy": max(stopper.accuracies),
+        "epochs_run": len(stopper.accuracies),
+        "stopped_early": stopper.stopped_early,
+        "samples_per_second": float(np.mean(epoch_throughputs)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parallel hyperparameter sweep over the BERT classifier.")
+    parser.add_argument("--space", help="JSON file mapping hyperparameter names to lists of values")
+    parser.add_argument("--trials", type=int, default=None, help="Randomly sample this many trials from the grid")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--base-model", default="bert-base-uncased")
+    parser.add_argument("--output", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    space = dict(DEFAULT_SPACE)
+    if args.space:
+        with open(args.space) as f:
+            space.update(json.load(f))
+    trials = expand_trials(space, args.trials)
+    print(f"Running {len(trials)} trials on {args.workers} workers.")
+
+    # Read and tokenize each dataset once per max_length, then share it with every trial
+    tokenizer = BertTokenizerFast.from_pretrained(args.base_model)
+    blocks = []
+    shared_data = {}
+    for dataset_name in sorted({trial["dataset"] for trial in trials}):
+        df = load_dataset(dataset_name)
+        labels = df["label_encoded"].to_numpy()
+        train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+        for max_length in sorted({trial["max_length"] for trial in trials if trial["dataset"] == dataset_name}):
+            encodings = load_or_tokenize(df["title"], tokenizer, max_length=max_length)
+            data = {
+                "labels": labels,
+                "train_idx": train_idx,
+                "test_idx": test_idx,
+                "num_labels": int(labels.max()) + 1,
+                "pad_token_id": tokenizer.pad_token_id,
+            }
+            for name in ("input_ids", "attention_mask"):
+                block, data[name] = share_array(encodings[name])
+                blocks.append(block)
+            shared_data[(dataset_name, max_length)] = data
+
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    try:
+        with context.Manager() as manager, \
+                ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+            history = manager.dict()
+            lock = manager.Lock()
+            futures = [
+                executor.submit(run_trial, trial_id, params, shared_data[(params["dataset"], params["max_length"])],
+                                args.base_model, history, lock, threads)
+                for trial_id, params in enumerate(trials)
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+                print(f"Trial {results[-1]['trial']} finished: accuracy {results[-1]['accuracy']:.4f} "
+                      f"after {results[-1]['epochs_run']} epochs")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    results_df = pd.DataFrame(results).sort_values("accuracy", ascending=False)
+    results_df.to_csv(args.output, index=False)
+    print("\nSweep results:")
+    print(results_df.to_string(index=False))
+    print(f"\nResults saved to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# The scripts live next to this directory and import each other by module name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+# Serves the saved "latest" listing pages the way the site does: /news/latest?pgno=N, page 1 without pgno.
+# Records which pages were requested and how many requests were in flight at once; pages in `failing`
+# answer 500 and pages in `delays` are held back for that many seconds.
+class ListingSite:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.delays = {}
+        self.failing = set()
+        self.requests = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                page = int(parse_qs(url.query).get("pgno", ["1"])[0])
+                with site.lock:
+                    site.requests.append(page)
+                    site.in_flight += 1
+                    site.peak_in_flight = max(site.peak_in_flight, site.in_flight)
+                try:
+                    time.sleep(site.delays.get(page, site.delay))
+                    path = os.path.join(FIXTURES, "latest", f"page{page}.html")
+                    if url.path != "/news/latest" or page in site.failing or not os.path.exists(path):
+                        status, body = (404 if page not in site.failing else 500), b"Not found"
+                    else:
+                        with open(path, "rb") as f:
+                            status, body = 200, f.read()
+                finally:
+                    with site.lock:
+                        site.in_flight -= 1
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def section(self, **overrides):
+        """A "latest"-style section pointing at this server, with the crawler's defaults filled in."""
+        from crawler import SECTION_DEFAULTS
+
+        section = {**SECTION_DEFAULTS, "name": "latest", "category": "news", "url": f"{self.base_url}/news/latest",
+                   "link_type": "Paged Stories", "label": None, "max_pages": 11, "title_from": "text",
+                   "pagination": "next_page", "fetch": "http"}
+        section.update(overrides)
+        return section
+
+
+@pytest.fixture
+def site():
+    site = ListingSite()
+    thread = threading.Thread(target=site.server.serve_forever, daemon=True)
+    thread.start()
+    yield site
+    site.server.shutdown()
+    site.server.server_close()
@@ -0,0 +1,89 @@
+import json
+
+import pandas as pd
+
+from crawler import SeenLinks, crawl, fetch_section, index_path, main
+
+
+def page_links(page, base_url):
+    return [f"{base_url}/news/2024/{page}/{i}" for i in range(3)] + [f"https://www.example.com/partner/{page}"]
+
+
+def test_fetch_section_stops_at_known_page(site):
+    seen = SeenLinks(page_links(2, site.base_url))
+
+    result = fetch_section(site.section(), site.base_url, seen, concurrency=4)
+
+    assert result["stopped"] == "known"
+    assert result["pages"] == 2
+    assert [row["link"] for row in result["rows"]] == page_links(1, site.base_url)
+    # Links of pages past the known one are not recorded, so a later crawl still picks them up
+    assert set(seen) == set(page_links(1, site.base_url) + page_links(2, site.base_url))
+
+
+def test_fetch_section_stops_at_max_pages(site):
+    result = fetch_section(site.section(max_pages=2), site.base_url, SeenLinks(), concurrency=4)
+
+    assert result["stopped"] == "max_pages"
+    assert result["pages"] == 2
+    assert [row["link"] for row in result["rows"]] == page_links(1, site.base_url) + page_links(2, site.base_url)
+    assert sorted(site.requests) == [1, 2]
+
+
+def test_fetch_section_walks_to_the_end(site):
+    result = fetch_section(site.section(), site.base_url, SeenLinks(), concurrency=4)
+
+    assert result["stopped"] == "end"
+    assert result["pages"] == 4
+    assert len(result["rows"]) == 16
+
+
+def test_fetch_section_full_crawl_skips_known_links(site):
+    seen = SeenLinks(page_links(2, site.base_url))
+
+    result = fetch_section(site.section(), site.base_url, seen, concurrency=4, incremental=False)
+
+    assert result["stopped"] == "end"
+    assert result["pages"] == 4
+    assert [row["link"] for row in result["rows"]] == (page_links(1, site.base_url) + page_links(3, site.base_url)
+                                                       + page_links(4, site.base_url))
+
+
+def test_crawl_keeps_outputs_apart(site):
+    # A story listed both in a category and in the latest news belongs in both CSVs
+    sections = [site.section(name="category", label="News", output="labeled.csv"),
+                site.section(name="latest", output="latest.csv")]
+    seen = {"labeled.csv": SeenLinks(page_links(3, site.base_url))}
+
+    results = crawl(sections, site.base_url, browsers=1, http_concurrency=4, seen=seen)
+
+    assert [result["pages"] for result in results] == [3, 4]
+    assert results[0]["stopped"] == "known"
+    assert len(results[1]["rows"]) == 16
+
+
+def test_main_keeps_one_index_per_csv(site, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # The latest news already holds page 1's stories; the labeled CSV has none of them yet
+    pd.DataFrame({"title": ["Story"] * 4, "link": page_links(1, site.base_url)}).to_csv("latest.csv", index=False)
+    config = {"base_url": site.base_url, "output": "labeled.csv", "sections": [
+        {"name": "category", "category": "news", "url": "/news/latest", "link_type": "Paged Stories",
+         "label": "News", "max_pages": 11, "title_from": "text", "pagination": "next_page", "fetch": "http"},
+        {"name": "latest", "category": "news", "url": "/news/latest", "link_type": "Paged Stories",
+         "label": None, "max_pages": 11, "title_from": "text", "pagination": "next_page", "fetch": "http",
+         "output": "latest.csv"},
+    ]}
+    with open("sections.json", "w") as f:
+        json.dump(config, f)
+
+    main(["--config", "sections.json"])
+
+    assert len(pd.read_csv("labeled.csv")) == 16
+    with open(index_path("labeled.csv")) as f:
+        assert len(json.load(f)["links"]) == 16
+    with open(index_path("latest.csv")) as f:
+        index = json.load(f)
+    # Page 1 was known from the CSV, so the latest section stopped there without new stories
+    assert len(index["links"]) == 4
+    assert index["sections"]["latest"]["stopped"] == "known"
+    assert "category" not in index["sections"]
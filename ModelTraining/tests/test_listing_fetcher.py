@@ -0,0 +1,86 @@
+import asyncio
+
+from conftest import read_fixture
+from listing_fetcher import fetch_listing, parse_listing
+
+BASE_URL = "https://www.thestar.com.my"
+SECTION = {"name": "latest", "link_type": "Paged Stories", "title_from": "text", "label": "News",
+           "url": f"{BASE_URL}/news/latest", "max_pages": 11}
+
+
+def story_links(page, base_url=BASE_URL):
+    return [f"{base_url}/news/2024/{page}/{i}" for i in range(3)]
+
+
+def test_parse_listing_rows_in_page_order():
+    rows, _ = parse_listing(read_fixture("latest/page1.html"), SECTION, BASE_URL)
+
+    # Links of other types, links without a title and links inside <script> are left out
+    assert [row["link"] for row in rows] == story_links(1) + ["https://www.example.com/partner/1"]
+    assert [row["title"] for row in rows] == ["Story 1-0", "Story 1-1", "Story 1-2", "Partner story 1"]
+    assert all(row["label"] == "News" for row in rows)
+
+
+def test_parse_listing_title_from_attribute():
+    rows, _ = parse_listing(read_fixture("latest/page1.html"), dict(SECTION, title_from="data-content-title"),
+                            BASE_URL)
+
+    assert [row["title"] for row in rows] == ["Story 1-0", "Story 1-1", "Story 1-2"]
+
+
+def test_parse_listing_pager():
+    _, pages = parse_listing(read_fixture("latest/page2.html"), SECTION, BASE_URL)
+
+    assert pages == {1: "/news/latest?pgno=1", 3: "/news/latest?pgno=3", 4: "/news/latest?pgno=4"}
+
+
+def test_parse_listing_without_articles():
+    assert parse_listing("<html><body><p>Enable JavaScript</p></body></html>", SECTION, BASE_URL) == ([], {})
+
+
+def test_fetch_listing_discovers_pages_in_parallel(site):
+    pages, wait, parse = asyncio.run(fetch_listing(site.section(), site.base_url, concurrency=4))
+
+    assert sorted(pages) == [1, 2, 3, 4]
+    assert [row["link"] for row in pages[3]][:3] == story_links(3, site.base_url)
+    # Every page is requested once, and pages 2 and 3 (both on page 1's pager) at the same time
+    assert sorted(site.requests) == [1, 2, 3, 4]
+    assert site.peak_in_flight >= 2
+    assert wait > 0 and parse > 0
+
+
+def test_fetch_listing_respects_max_pages(site):
+    pages, _, _ = asyncio.run(fetch_listing(site.section(max_pages=2), site.base_url))
+
+    assert sorted(pages) == [1, 2]
+    assert sorted(site.requests) == [1, 2]
+
+
+def test_fetch_listing_stops_after_done_page(site):
+    # Page 3 is slow, so page 4 can only be reached through page 2's pager, which comes after the cut-off
+    site.delays[3] = 0.5
+    done_links = set(story_links(2, site.base_url))
+
+    pages, _, _ = asyncio.run(fetch_listing(site.section(), site.base_url,
+                                            is_done=lambda rows: any(row["link"] in done_links for row in rows)))
+
+    assert sorted(pages) == [1, 2, 3]
+    assert 4 not in site.requests
+
+
+def test_fetch_listing_done_on_first_page(site):
+    pages, _, _ = asyncio.run(fetch_listing(site.section(), site.base_url, is_done=lambda rows: True))
+
+    assert list(pages) == [1]
+    assert site.requests == [1]
+
+
+def test_fetch_listing_failed_page(site, capsys):
+    site.failing.add(2)
+
+    pages, _, _ = asyncio.run(fetch_listing(site.section(), site.base_url))
+
+    # The failed page comes back empty; the others are still fetched through the remaining pagers
+    assert pages[2] == []
+    assert sorted(pages) == [1, 2, 3, 4]
+    assert "Page 2" in capsys.readouterr().out
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+# Directory holding one sub-directory of memory-mapped arrays per cache key
+CACHE_DIR = "tokenized_cache"
+
+
+def cache_key(texts, tokenizer, max_length):
+    """Build a cache key from the tokenizer, max_length and a hash of the titles."""
+    data_hash = hashlib.sha1()
+    for text in texts:
+        data_hash.update(text.encode("utf-8"))
+        data_hash.update(b"\0")
+
+    # Fast and slow tokenizers produce the same ids, so only the vocabulary identity matters
+    tokenizer_id = f"{tokenizer.name_or_path}:{len(tokenizer)}"
+    key_source = f"{tokenizer_id}|{max_length}|{data_hash.hexdigest()}"
+    return hashlib.sha1(key_source.encode("utf-8")).hexdigest()[:16]
+
+
+def load_or_tokenize(texts, tokenizer, max_length, cache_dir=CACHE_DIR, batch_size=1024):
+    """Return memory-mapped input_ids/attention_mask for texts, tokenizing only on a cache miss."""
+    texts = [str(text) for text in texts]
+    key = cache_key(texts, tokenizer, max_length)
+    entry_dir = os.path.join(cache_dir, key)
+
+    if os.path.exists(os.path.join(entry_dir, "meta.json")):
+        print(f"Loaded {len(texts)} tokenized titles from cache ({key}).")
+    else:
+        print(f"Tokenizing {len(texts)} titles (cache miss: {key})...")
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Write into a private directory first so a crashed run never leaves a partial entry
+        tmp_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir)
+        input_ids = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, "input_ids.npy"), mode="w+", dtype=np.int32, shape=(len(texts), max_length)
+        )
+        attention_mask = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, "attention_mask.npy"), mode="w+", dtype=np.int8, shape=(len(texts), max_length)
+        )
+
+        # Batch-encode the whole column; fast tokenizers parallelize each batch internally
+        for start in range(0, len(texts), batch_size):
+            end = start + batch_size
+            encoding = tokenizer(
+                texts[start:end],
+                max_length=max_length,
+                padding="max_length",
+                truncation=True,
+                return_tensors="np",
+            )
+            input_ids[start:end] = encoding["input_ids"]
+            attention_mask[start:end] = encoding["attention_mask"]
+
+        input_ids.flush()
+        attention_mask.flush()
+        del input_ids, attention_mask
+
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({
+                "tokenizer": tokenizer.name_or_path,
+                "vocab_size": len(tokenizer),
+                "max_length": max_length,
+                "num_texts": len(texts),
+            }, f)
+
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another run populated the same key concurrently; keep theirs
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        "input_ids": np.load(os.path.join(entry_dir, "input_ids.npy"), mmap_mode="r"),
+        "attention_mask": np.load(os.path.join(entry_dir, "attention_mask.npy"), mmap_mode="r"),
+    }
+
+
+# Dataset over pre-tokenized, memory-mapped encodings; samples are unpadded for dynamic padding
+class NewsDataset(Dataset):
+    def __init__(self, encodings, indices, labels):
+        self.input_ids = encodings["input_ids"]
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.lengths = np.asarray(encodings["attention_mask"][self.indices].sum(axis=1), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, idx):
+        row = self.indices[idx]
+        return {
+            "input_ids": torch.from_numpy(self.input_ids[row, :self.lengths[idx]].astype(np.int64)),
+            "label": torch.tensor(self.labels[idx], dtype=torch.long),
+        }
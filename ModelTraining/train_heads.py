@@ -0,0 +1,98 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_class_weight
+
+from embedding_cache import load_or_embed
+from news_data import DATASETS, load_dataset
+
+
+def build_head(kind, hidden_size, num_labels, mlp_hidden=256, dropout=0.1):
+    if kind == "linear":
+        return torch.nn.Linear(hidden_size, num_labels)
+    return torch.nn.Sequential(
+        torch.nn.Linear(hidden_size, mlp_hidden),
+        torch.nn.GELU(),
+        torch.nn.Dropout(dropout),
+        torch.nn.Linear(mlp_hidden, num_labels),
+    )
+
+
+def train_head(head, X_train, y_train, lr, epochs, class_weights=None, batch_size=256, seed=42):
+    """Train a classifier head on cached embeddings held as in-memory tensors."""
+    torch.manual_seed(seed)
+    optimizer = torch.optim.AdamW(head.parameters(), lr=lr)
+    loss_fn = torch.nn.CrossEntropyLoss(weight=class_weights)
+    head.train()
+    for _ in range(epochs):
+        for batch in torch.randperm(len(y_train)).split(batch_size):
+            optimizer.zero_grad()
+            loss = loss_fn(head(X_train[batch]), y_train[batch])
+            loss.backward()
+            optimizer.step()
+    head.eval()
+    return head
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep classifier heads over frozen BERT embeddings.")
+    parser.add_argument("--model", default="bert-base-uncased", help="Encoder whose embeddings are cached")
+    parser.add_argument("--pooling", default="mean", choices=["mean", "cls", "pooler"])
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS), choices=list(DATASETS))
+    parser.add_argument("--heads", nargs="+", default=["linear", "mlp"], choices=["linear", "mlp"])
+    parser.add_argument("--lrs", nargs="+", type=float, default=[1e-3, 3e-3])
+    parser.add_argument("--epochs", nargs="+", type=int, default=[30])
+    parser.add_argument("--output", default="head_sweep_results.csv")
+    args = parser.parse_args()
+
+    results = []
+    for dataset_name in args.datasets:
+        df = load_dataset(dataset_name)
+        embeddings = torch.from_numpy(np.asarray(load_or_embed(df["title"], args.model, pooling=args.pooling)))
+        labels = torch.tensor(df["label_encoded"].to_numpy(), dtype=torch.long)
+        num_labels = int(labels.max()) + 1
+
+        # Same split as the fine-tuning scripts so head and full fine-tuning accuracies are comparable
+        train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+        X_train, X_test = embeddings[train_idx], embeddings[test_idx]
+        y_train, y_test = labels[train_idx], labels[test_idx]
+
+        weights = torch.tensor(
+            compute_class_weight(class_weight="balanced", classes=np.arange(num_labels), y=y_train.numpy()),
+            dtype=torch.float,
+        )
+
+        for kind, use_weights, lr, epochs in itertools.product(args.heads, [False, True], args.lrs, args.epochs):
+            start = time.perf_counter()
+            head = build_head(kind, embeddings.size(1), num_labels)
+            train_head(head, X_train, y_train, lr, epochs, class_weights=weights if use_weights else None)
+            with torch.no_grad():
+                preds = head(X_test).argmax(dim=1).numpy()
+
+            results.append({
+                "dataset": dataset_name,
+                "head": kind,
+                "class_weights": use_weights,
+                "lr": lr,
+                "epochs": epochs,
+                "accuracy": float((preds == y_test.numpy()).mean()),
+                "macro_f1": f1_score(y_test.numpy(), preds, average="macro"),
+                "seconds": time.perf_counter() - start,
+            })
+            print(results[-1])
+
+    results_df = pd.DataFrame(results).sort_values("accuracy", ascending=False)
+    results_df.to_csv(args.output, index=False)
+    print("\nHead sweep results:")
+    print(results_df.to_string(index=False))
+    print(f"\nResults saved to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
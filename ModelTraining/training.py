@@ -0,0 +1,395 @@
+import argparse
+import copy
+import json
+import os
+import time
+
+import torch
+import torch.distributed as dist
+from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_class_weight
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler
+from transformers import BertTokenizerFast, BertForSequenceClassification, AdamW
+
+from checkpointing import CheckpointManager
+from distributed import (SCALING_BASELINE_FILE, cleanup_distributed, get_world_size, init_distributed,
+                         is_distributed, is_main_process, main_process_first, report_scaling)
+from dynamic_padding import DynamicPaddingCollator, LengthBucketSampler
+from metrics import MetricTracker
+from tokenized_cache import NewsDataset, load_or_tokenize
+
+
+def build_arg_parser(description, checkpoint_name):
+    """Command-line options shared by the plain, class-weighted and augmented training scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--bf16", action="store_true", help="Run forward passes under bf16 autocast")
+    parser.add_argument("--compile", action="store_true", help="Compile the model with torch.compile")
+    parser.add_argument(
+        "--accuracy-tolerance", type=float, default=0.01,
+        help="Maximum allowed accuracy drop of the bf16/compiled mode versus the fp32/eager reference",
+    )
+    parser.add_argument(
+        "--reference-file", default=f"fp32_reference_{checkpoint_name}.json",
+        help="Per-epoch test accuracy written by a plain fp32/eager run and checked by bf16/compiled runs",
+    )
+    parser.add_argument(
+        "--scaling-baseline", default=SCALING_BASELINE_FILE.format(checkpoint_name),
+        help="Single-process throughput written by a plain run and compared against by --distributed runs",
+    )
+    parser.add_argument(
+        "--distributed", action="store_true",
+        help="Data-parallel training over the gloo process group set up by torchrun",
+    )
+    parser.add_argument(
+        "--checkpoint-dir", default=os.path.join("checkpoints", checkpoint_name),
+        help="Directory for periodic full-state checkpoints",
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=200,
+        help="Write a checkpoint every N optimizer steps (0 disables checkpointing)",
+    )
+    parser.add_argument("--resume", action="store_true", help="Continue from the newest checkpoint")
+    parser.add_argument(
+        "--log-interval", type=int, default=None,
+        help="Print running loss/accuracy every N steps (each print syncs with the device)",
+    )
+    return parser
+
+
+# Training loop with accuracy calculation; returns the samples/s of every epoch across all ranks
+def train_model(model, train_loader, loss_fn, optimizer, device, epochs=3, bf16=False, report=None, log_interval=None,
+                checkpoints=None, resume_state=None):
+    model.train()
+    metrics = MetricTracker(device)
+    epoch_throughputs = []
+
+    # Continue from the exact step recorded in the checkpoint
+    start_epoch, start_step = 0, 0
+    if resume_state is not None:
+        start_epoch, start_step = resume_state["epoch"], resume_state["step"]
+        if start_step >= len(train_loader):
+            start_epoch, start_step = start_epoch + 1, 0
+
+    for epoch in range(start_epoch, epochs):
+        epoch_start = time.perf_counter()
+        metrics.reset()
+        real_tokens = 0
+        processed_tokens = 0
+        first_step = 0
+        resumed_samples = 0
+
+        # Reshuffle the length buckets for this epoch
+        if hasattr(train_loader.batch_sampler, "set_epoch"):
+            train_loader.batch_sampler.set_epoch(epoch)
+
+        if epoch == start_epoch and start_step:
+            first_step = start_step
+            train_loader.batch_sampler.set_start_batch(start_step)
+            progress = resume_state["progress"]
+            metrics.load_state_dict(progress["metrics"])
+            real_tokens, processed_tokens = progress["real_tokens"], progress["processed_tokens"]
+            resumed_samples = int(metrics.confusion.sum())
+
+        # Creating the iterator draws a seed from the global RNG; mid-epoch checkpoints were taken after
+        # that draw, epoch-boundary ones before it
+        resuming = epoch == start_epoch and resume_state is not None
+        if resuming and not first_step:
+            checkpoints.restore_rng(resume_state)
+        batches = iter(train_loader)
+        if resuming and first_step:
+            checkpoints.restore_rng(resume_state)
+
+        for step, batch in enumerate(batches, start=first_step):
+            optimizer.zero_grad()
+            input_ids = batch["input_ids"].to(device)
+            attention_mask = batch["attention_mask"].to(device)
+            labels = batch["label"].to(device)
+
+            # Count tokens on the CPU copy of the mask to avoid a device sync
+            real_tokens += int(batch["attention_mask"].sum())
+            processed_tokens += batch["attention_mask"].numel()
+
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=bf16):
+                outputs = model(input_ids, attention_mask=attention_mask)
+                logits = outputs.logits
+                loss = loss_fn(logits.float(), labels)
+
+            # Update gradients and optimizer
+            loss.backward()
+            optimizer.step()
+
+            # Loss and accuracy stay on the device; they are only synced when logged
+            metrics.update(logits, labels, loss)
+
+            if checkpoints is not None:
+                checkpoints.step(epoch, step + 1, {
+                    "metrics": metrics.state_dict(),
+                    "real_tokens": real_tokens,
+                    "processed_tokens": processed_tokens,
+                })
+
+            if log_interval and (step + 1) % log_interval == 0 and is_main_process():
+                running = metrics.compute()
+                print(f"  Step {step + 1}/{len(train_loader)}, Loss: {running['loss']:.4f}, "
+                      f"Accuracy: {running['accuracy']:.4f}")
+
+        elapsed = time.perf_counter() - epoch_start
+
+        resumed_samples_tensor = torch.tensor([resumed_samples], dtype=torch.float64)
+
+        # Combine the per-rank counters once per epoch
+        if is_distributed():
+            metrics.all_reduce()
+            totals = torch.tensor([real_tokens, processed_tokens], dtype=torch.float64)
+            dist.all_reduce(totals)
+            real_tokens, processed_tokens = totals.tolist()
+            dist.all_reduce(resumed_samples_tensor)
+            elapsed_tensor = torch.tensor([elapsed], dtype=torch.float64)
+            dist.all_reduce(elapsed_tensor, op=dist.ReduceOp.MAX)
+            elapsed = elapsed_tensor.item()
+
+        # Calculate epoch-level accuracy and throughput
+        epoch_metrics = metrics.compute()
+        samples_per_second = (epoch_metrics["samples"] - resumed_samples_tensor.item()) / elapsed
+        epoch_throughputs.append(samples_per_second)
+
+        if is_main_process():
+            print(f"Epoch {epoch + 1}/{epochs}, Loss: {epoch_metrics['loss']:.4f}, "
+                  f"Accuracy: {epoch_metrics['accuracy']:.4f}, Throughput: {samples_per_second:.1f} samples/s")
+            print_token_report(int(real_tokens), int(processed_tokens))
+
+            # The fp32 eager baseline is measured in a single process, so compare per-process throughput.
+            # A report returning True stops training early (single-process runs only).
+            # The report's evaluation draws from the global RNG (the test loader's seed); forked so that
+            # a run resumed from a checkpoint taken at the end of this epoch draws the same numbers
+            if report is not None:
+                with torch.random.fork_rng():
+                    stop = report.epoch_end(model, epoch, samples_per_second / get_world_size())
+                model.train()
+                if stop and not is_distributed():
+                    break
+
+    if checkpoints is not None:
+        checkpoints.wait()
+    return epoch_throughputs
+
+
+# Evaluation function
+def evaluate_model(model, test_loader, device, bf16=False, verbose=True):
+    model.eval()
+    metrics = MetricTracker(device)
+    real_tokens = 0
+    processed_tokens = 0
+    with torch.no_grad():
+        for batch in test_loader:
+            input_ids = batch["input_ids"].to(device)
+            attention_mask = batch["attention_mask"].to(device)
+            labels = batch["label"].to(device)
+
+            real_tokens += int(batch["attention_mask"].sum())
+            processed_tokens += batch["attention_mask"].numel()
+
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=bf16):
+                outputs = model(input_ids, attention_mask=attention_mask)
+            metrics.update(outputs.logits, labels)
+
+    accuracy = metrics.compute()["accuracy"]
+    if verbose:
+        print_token_report(real_tokens, processed_tokens)
+        print("\nAccuracy:", accuracy)
+        print("\nClassification Report:")
+        print(metrics.classification_report())
+    return accuracy
+
+
+def print_token_report(real_tokens, processed_tokens):
+    """Report how many of the tokens fed to the model were real versus padding."""
+    padded_tokens = processed_tokens - real_tokens
+    padding_share = padded_tokens / processed_tokens if processed_tokens else 0.0
+    print(f"Tokens processed: {processed_tokens}, real: {real_tokens}, padding: {padded_tokens} ({padding_share:.1%})")
+
+
+# Compare a bf16 and/or compiled training mode against plain fp32 eager execution. Accuracy is checked
+# against the per-epoch test accuracy that a plain single-process run from scratch (no --bf16/--compile,
+# --distributed or --resume) records in reference_file.
+class ModeReport:
+    def __init__(self, eager_model, test_loader, device, bf16=False, compiled=False, tolerance=0.01,
+                 reference_file=None):
+        self.eager_model = eager_model
+        self.test_loader = test_loader
+        self.device = device
+        self.bf16 = bf16
+        self.compiled = compiled
+        self.tolerance = tolerance
+        self.reference_file = reference_file
+        self.reference_accuracy = {}
+        if reference_file and os.path.exists(reference_file):
+            with open(reference_file) as f:
+                self.reference_accuracy = json.load(f)["accuracy"]
+        self.baseline_samples_per_second = None
+
+    @property
+    def recording(self):
+        """True for a plain fp32/eager run, which records the reference instead of checking against it."""
+        return not (self.bf16 or self.compiled)
+
+    @property
+    def mode_name(self):
+        if self.recording:
+            return "fp32/eager"
+        return "+".join(name for name, enabled in (("bf16", self.bf16), ("compiled", self.compiled)) if enabled)
+
+    def measure_baseline(self, train_loader, loss_fn, optimizer, num_batches=20):
+        """Time fp32 eager training steps on a throwaway copy so the real model is left untouched."""
+        model = copy.deepcopy(self.eager_model)
+        baseline_optimizer = type(optimizer)(model.parameters(), **optimizer.defaults)
+        model.train()
+
+        total_samples = 0
+        start = time.perf_counter()
+        for step, batch in enumerate(train_loader):
+            if step == num_batches:
+                break
+            baseline_optimizer.zero_grad()
+            outputs = model(batch["input_ids"].to(self.device), attention_mask=batch["attention_mask"].to(self.device))
+            loss = loss_fn(outputs.logits, batch["label"].to(self.device))
+            loss.backward()
+            baseline_optimizer.step()
+            total_samples += batch["label"].size(0)
+
+        self.baseline_samples_per_second = total_samples / (time.perf_counter() - start)
+        print(f"fp32/eager baseline throughput: {self.baseline_samples_per_second:.1f} samples/s")
+        del model, baseline_optimizer
+
+    def epoch_end(self, model, epoch, samples_per_second):
+        """Print throughput versus fp32 eager and check that test accuracy stays within tolerance of the reference."""
+        accuracy = evaluate_model(model, self.test_loader, self.device, bf16=self.bf16, verbose=False)
+        if self.recording:
+            self.reference_accuracy[str(epoch + 1)] = accuracy
+            if self.reference_file:
+                with open(self.reference_file, "w") as f:
+                    json.dump({"accuracy": self.reference_accuracy}, f)
+            print(f"[{self.mode_name}] Epoch {epoch + 1}: reference accuracy {accuracy:.4f} "
+                  f"saved to {self.reference_file}")
+            return
+
+        if self.baseline_samples_per_second:
+            speedup = samples_per_second / self.baseline_samples_per_second
+            print(f"[{self.mode_name}] Epoch {epoch + 1}: {samples_per_second:.1f} samples/s vs "
+                  f"{self.baseline_samples_per_second:.1f} fp32/eager ({speedup:.2f}x)")
+        fp32_accuracy = self.reference_accuracy.get(str(epoch + 1))
+        if fp32_accuracy is None:
+            print(f"[{self.mode_name}] Epoch {epoch + 1}: accuracy {accuracy:.4f}; no fp32/eager reference for this "
+                  f"epoch in {self.reference_file}, run once without --bf16/--compile to record one.")
+            return
+        accuracy_drop = fp32_accuracy - accuracy
+        status = "OK" if accuracy_drop <= self.tolerance else "EXCEEDS TOLERANCE"
+        print(f"[{self.mode_name}] Epoch {epoch + 1}: accuracy {accuracy:.4f} vs fp32/eager {fp32_accuracy:.4f} "
+              f"(drop {accuracy_drop:+.4f}, tolerance {self.tolerance}) {status}")
+
+
+def run_training(args, df, output_dir):
+    """Fine-tune bert-base-uncased on df's titles and label_encoded with the shared command-line options.
+
+    Handles the class-weighted loss, the 80/20 split, --distributed, --compile, the bf16/compiled
+    ModeReport, checkpointing with --resume, and saving the model to output_dir on rank 0.
+    """
+    # Every process started by torchrun joins the gloo group and trains on its own shard
+    if args.distributed:
+        init_distributed()
+
+    # Check GPU availability
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    # Compute class weights
+    class_weights = compute_class_weight(
+        class_weight="balanced",
+        classes=df["label_encoded"].unique(),
+        y=df["label_encoded"]
+    )
+    class_weights_tensor = torch.tensor(class_weights, dtype=torch.float).to(device)
+
+    # Split the dataset
+    X_train, X_test, y_train, y_test = train_test_split(
+        df["title"], df["label_encoded"], test_size=0.2, random_state=42
+    )
+
+    # Tokenize every title once; later epochs and runs reuse the memory-mapped cache
+    tokenizer = BertTokenizerFast.from_pretrained("bert-base-uncased")
+    with main_process_first():
+        encodings = load_or_tokenize(df["title"], tokenizer, max_length=128)
+    train_dataset = NewsDataset(encodings, X_train.index, y_train)
+    test_dataset = NewsDataset(encodings, X_test.index, y_test)
+
+    # Create DataLoaders that pad each batch to its longest title and bucket titles by length
+    collator = DynamicPaddingCollator(pad_token_id=tokenizer.pad_token_id)
+    train_sampler = DistributedSampler(train_dataset, seed=42) if args.distributed else None
+    train_loader = DataLoader(
+        train_dataset,
+        batch_sampler=LengthBucketSampler(train_dataset.lengths, batch_size=16, shuffle=True, sampler=train_sampler),
+        collate_fn=collator,
+    )
+    test_loader = DataLoader(
+        test_dataset,
+        batch_sampler=LengthBucketSampler(test_dataset.lengths, batch_size=16, shuffle=False, pool_size=None),
+        collate_fn=collator,
+    )
+
+    # Initialize the model
+    model = BertForSequenceClassification.from_pretrained(
+        "bert-base-uncased",
+        num_labels=len(df["label_encoded"].unique())
+    )
+    model.to(device)
+
+    # Optimizer and loss function
+    optimizer = AdamW(model.parameters(), lr=2e-5, eps=1e-8)
+    loss_fn = torch.nn.CrossEntropyLoss(weight=class_weights_tensor)
+
+    # bf16/compiled runs are compared against fp32 eager every epoch. Only a plain single-process run from
+    # scratch records the reference accuracy; distributed or resumed plain runs get no report, as their
+    # batches differ from the reference's. The baseline is timed before --resume loads a state dict into the
+    # optimizer, which adds defaults its constructor does not accept.
+    records_reference = get_world_size() == 1 and not args.resume
+    report = None
+    if is_main_process() and (args.bf16 or args.compile or records_reference):
+        report = ModeReport(model, test_loader, device, bf16=args.bf16, compiled=args.compile,
+                            tolerance=args.accuracy_tolerance, reference_file=args.reference_file)
+        if not report.recording:
+            report.measure_baseline(train_loader, loss_fn, optimizer)
+
+    # Periodic checkpoints of the full training state; --resume picks up from the newest one
+    checkpoints = None
+    resume_state = None
+    if args.checkpoint_every or args.resume:
+        checkpoints = CheckpointManager(args.checkpoint_dir, model, optimizer, every_n_steps=args.checkpoint_every)
+        if args.resume:
+            resume_state = checkpoints.restore()
+
+    # Average gradients across workers; BERT's buffers are constant so they need no broadcast
+    train_target = DistributedDataParallel(model, broadcast_buffers=False) if args.distributed else model
+
+    # Optionally compile the model
+    if args.compile:
+        train_target = torch.compile(train_target, dynamic=True)
+
+    # Train and evaluate
+    epoch_throughputs = train_model(
+        train_target, train_loader, loss_fn, optimizer, device, epochs=3, bf16=args.bf16, report=report,
+        log_interval=args.log_interval, checkpoints=checkpoints, resume_state=resume_state,
+    )
+    if is_main_process():
+        if epoch_throughputs:
+            # Only plain fp32/eager runs from scratch are a fair single-process baseline
+            report_scaling(epoch_throughputs[-1], args.scaling_baseline,
+                           record=not (args.bf16 or args.compile or args.resume))
+        evaluate_model(train_target, test_loader, device, bf16=args.bf16)
+
+    # Save the trained model (rank 0 only)
+    if is_main_process():
+        model.save_pretrained(output_dir)
+        tokenizer.save_pretrained(output_dir)
+        print(f"Model saved to {output_dir}")
+
+    cleanup_distributed()
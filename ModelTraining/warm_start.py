@@ -0,0 +1,114 @@
+import argparse
+import threading
+import time
+
+from labels import label_for
+
+WARMUP_HEADLINE = "Warmup headline for the news classifier"
+
+
+# Loads a classifier on a background thread so the caller can render immediately.
+# Records how long the heavy imports, the weight load and the first forward pass took.
+# graph_mode ("eager", "trace" or "compile") serves torch backends through per-length-bucket graphs.
+class WarmModel:
+    def __init__(self, model_dir, backend="fp32", mmap=True, graph_mode=None):
+        self.model_dir = model_dir
+        self.backend = backend
+        self.mmap = mmap
+        self.graph_mode = graph_mode
+        self.timings = {}
+        self.error = None
+        self._predict_proba = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._load, name=f"warmup-{backend}", daemon=True)
+        self._thread.start()
+
+    def _phase(self, name, start):
+        now = time.perf_counter()
+        self.timings[name] = now - start
+        return now
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            if self.backend == "onnx":
+                # Timed on their own, apart from building the session
+                import onnxruntime
+                import tokenizers
+                from onnx_inference import OnnxPredictor
+
+                start = self._phase("import", start)
+                predictor = OnnxPredictor(self.model_dir)
+                start = self._phase("weight_load", start)
+                self._predict_proba = predictor.predict_proba
+            else:
+                from inference import load_model, predict_proba
+
+                start = self._phase("import", start)
+                tokenizer, model = load_model(self.model_dir, backend=self.backend, mmap=self.mmap)
+                start = self._phase("weight_load", start)
+                self._predict_proba = lambda texts: predict_proba(texts, tokenizer, model)
+                if self.graph_mode:
+                    from bucketed_inference import BucketedPredictor
+
+                    predictor = BucketedPredictor(tokenizer, model, mode=self.graph_mode)
+                    start = self._phase("bucket_warmup", start)
+                    self._predict_proba = predictor.predict_proba
+
+            # The first forward pass pays for page faults on mapped weights and kernel setup
+            self._predict_proba([WARMUP_HEADLINE])
+            self._phase("first_inference", start)
+        except Exception as error:
+            self.error = error
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"{self.model_dir} ({self.backend}) still loading after {timeout}s")
+        if self.error:
+            raise self.error
+
+    def predict_proba(self, texts):
+        self.wait()
+        return self._predict_proba(texts)
+
+    def predict(self, text):
+        """Category name for one headline, like streamlit_app.predict()."""
+        return label_for(self.predict_proba([text])[0])
+
+    def report(self):
+        timings = dict(self.timings)
+        timings["total"] = sum(timings.values())
+        return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of a classifier backend in a fresh process.")
+    parser.add_argument("--model-dir", default="./bert_malaysian_news_model_augmented")
+    parser.add_argument("--backend", default="fp32", choices=("fp32", "int8", "onnx"))
+    parser.add_argument("--no-mmap", action="store_true", help="Load fp32 weights with from_pretrained instead")
+    parser.add_argument("--graph-mode", choices=("eager", "trace", "compile"),
+                        help="Serve through shape-bucketed graphs (torch backends only)")
+    args = parser.parse_args()
+
+    model_dir = args.model_dir
+    if args.backend == "onnx":
+        from onnx_inference import onnx_dir_for
+
+        model_dir = onnx_dir_for(args.model_dir)
+
+    process_start = time.perf_counter()
+    warm_model = WarmModel(model_dir, args.backend, mmap=not args.no_mmap, graph_mode=args.graph_mode)
+    print(f"Constructor returned after {(time.perf_counter() - process_start) * 1000:.1f} ms; loading in background")
+    warm_model.wait()
+    for phase, seconds in warm_model.report().items():
+        print(f"  {phase:<16} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()